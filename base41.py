@@ -22,8 +22,8 @@ Example Usage:
 >>> import uuid
 >>> u=uuid.UUID('a98bd614-b023-45c2-99b1-057a3edeff92')
 >>> b=b41encode(u.bytes)
->>> print(b.decode('ascii')) # for the benefit of python2/3 compatibility
-IQILHPPQJGIjJpG8R0FG9OUV
+>>> b
+b'IQILHPPQJGIjJpG8R0FG9OUV'
 >>> d=b41decode(b)
 >>> uuid.UUID(bytes=d)
 UUID('a98bd614-b023-45c2-99b1-057a3edeff92')
@@ -37,43 +37,55 @@ chars, but contains an embedded slash.
 Copyright: (c) Jazzy Services Limited 2017
 License file: ./LICENSE
 '''
+import argparse
+import array
+import codecs
+import collections
+import io
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import threading
+import time
+import uuid
+
+import crc16_8005
+
+# NumPy (if installed) is only imported by load_numpy(), on first use
+numpy = None
+
 #   _________
 # _| helpers |________________________________________________________________
 
 def out_tostring(src):
     return ''.join(chr(i) for i in src)
 
-if bytes == str:
-    out_tobytes = out_tostring
-    def in_tobytes(src):
-        return (ord(i) for i in src)
-else:
-    def out_tobytes(src):
-        return bytes(src)
-    def in_tobytes(src):
-        return src
+# Byte sources that support the buffer protocol can be encoded in bulk
+# rather than one octet at a time.
+BULK_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+
+def octet_view(src):
+    'View a bytes-like source as a flat buffer of octets.'
+    view = memoryview(src)
+    if not view.c_contiguous:
+        # e.g. a strided slice; struct.unpack_from needs contiguous octets
+        return memoryview(view.tobytes())
+    if view.ndim != 1 or view.format != 'B':
+        view = view.cast('B')
+    return view
 
 #   __________
 # _| ENCODING |_______________________________________________________________
 
 # The standard base41 alphabet
 # These are BYTEs rather than CHARs.
-# The bytearray() call is for the benefit of Python 2 to ensure that
-# the alphabet is bytes.
 ALFA = bytearray(b'0123456789jklmnopABCDEFGHIJKLMNOPQRSTUVWX')
 
-# Convert a BYTE-PAIR to UINT16
-# Python3 has from_bytes()
-# Python2 does it "long hand"
-# The encoding scheme always treats a BYTE-PAIR as a big-endian UINT16
-if hasattr(int, 'from_bytes'):
-    def pair_to_uint16(pair):
-        'Convert a pair of bytes to UINT16.'
-        return int.from_bytes(pair, 'big')
-else:
-    def pair_to_uint16(pair):
-        'Convert a pair of bytes to UINT16.'
-        return pair[0] << 8 | pair[1]
+def pair_to_uint16(pair):
+    'Convert a pair of bytes to UINT16.'
+    return int.from_bytes(pair, 'big')
 
 class B41Encoder(object):
     'Iterator to encode a byte source to the Base41 Alphabet.'
@@ -85,10 +97,13 @@ class B41Encoder(object):
     def u16_iter(my):
         'MANY octet-pair => MANY UINT16'
         while True:
-            # read two octets (may raise a StopIteration during either read)
+            # read two octets (the source may run out during either read)
             my.pair = bytearray()
-            my.pair.append(next(my.octets))
-            my.pair.append(next(my.octets))
+            try:
+                my.pair.append(next(my.octets))
+                my.pair.append(next(my.octets))
+            except StopIteration:
+                return
             u16 = pair_to_uint16(my.pair)
             yield u16
     def __iter__(my):
@@ -111,12 +126,62 @@ class B41Encoder(object):
         except IndexError:
             pass
 
+# Bulk encoding of bytes-like sources.
+# Every UINT16 maps to exactly one B41 triplet, so the triplets are
+# precomputed (on first use) and a buffer is encoded by unpacking it into
+# big-endian UINT16s and looking each one up.
+g_triplets = []
+
+def triplet_table():
+    'Return the table of UINT16 => B41 triplet (low-order char first).'
+    if not g_triplets:
+        chars = [bytes(ALFA[i:i+1]) for i in range(41)]
+        triplets = (lo + mid + hi for hi in chars for mid in chars for lo in chars)
+        # publish the whole table at once: other threads may be looking
+        g_triplets[:] = [triplet for _, triplet in zip(range(65536), triplets)]
+    return g_triplets
+
+# Number of octets unpacked at a time by the bulk encoder
+BULK_CHUNK = 0x10000
+
+def encode_trailing(octet):
+    'Encode a single trailing octet to one or two B41 bytes.'
+    hi,lo = divmod(octet, 41)
+    if hi > 0:
+        return bytes((ALFA[lo], ALFA[hi]))
+    return bytes(ALFA[lo:lo+1])
+
+def encode_pairs(octets, end, table, order='>'):
+    'Encode octets[:end] as UINT16s (big-endian) via a triplet table (chunks).'
+    chunks = []
+    for offset in range(0, end, BULK_CHUNK):
+        count = min(BULK_CHUNK, end - offset) // 2
+        u16s = struct.unpack_from('{0}{1}H'.format(order, count), octets, offset)
+        chunks.append(b''.join(map(table.__getitem__, u16s)))
+    return chunks
+
+def encode_buffer(src):
+    'Encode a bytes-like source using base41 encoding (in bulk).'
+    octets = octet_view(src)
+    if len(octets) >= NUMPY_THRESHOLD and load_numpy():
+        return b41encode_ndarray(octets).tobytes()
+    length = len(octets)
+    end = length & ~1
+    chunks = encode_pairs(octets, end, triplet_table())
+    if length & 1:
+        chunks.append(encode_trailing(bytearray(octets[end:])[0]))
+    return b''.join(chunks)
+
 def b41encode(src):
     'Encode a byte source using base41 encoding.'
-    return out_tobytes(byt for byt in B41Encoder(src))
+    if isinstance(src, BULK_TYPES):
+        return encode_buffer(src)
+    return bytes(byt for byt in B41Encoder(src))
 
 def b41string(src):
     'Encode a byte source using base41 encoding.'
+    if isinstance(src, BULK_TYPES):
+        return encode_buffer(src).decode('ascii')
     return out_tostring(byt for byt in B41Encoder(src))
 
 class B41U16Encoder(object):
@@ -144,6 +209,16 @@ class UnderflowError(ArithmeticError):
     def __init__(self, *args):
         super(UnderflowError, self).__init__(*args)
 
+class InvalidCharError(ValueError):
+    'A byte (or char) that is not in the base41 alphabet; args[1] is its offset.'
+    def __init__(self, *args):
+        super(InvalidCharError, self).__init__(*args)
+    def __str__(self):
+        return str(self.args[0])
+    @property
+    def offset(self):
+        return self.args[1]
+
 def b41d_filter(src):
     'Yield only B41-BYTEs from a byte source.'
     for byte in src:
@@ -188,9 +263,12 @@ class B41Decoder(object):
         # MANY b41-triplet => MANY UINT16
         while True:
             my.acc = bytearray()
-            my.acc.append(next(my.src))
-            my.acc.append(next(my.src))
-            my.acc.append(next(my.src))
+            try:
+                my.acc.append(next(my.src))
+                my.acc.append(next(my.src))
+                my.acc.append(next(my.src))
+            except StopIteration:
+                return
             u16 = decode_triplet(my.acc)
             yield u16
     def __iter__(my):
@@ -203,10 +281,142 @@ class B41Decoder(object):
         elif len(my.acc) == 1:
             yield decode_single(my.acc)
 
-def b41decode(src):
-    'Decode a base41-encoded byte source.'
-    dsrc = in_tobytes(src)
-    return out_tobytes(byt for byt in B41Decoder(dsrc))
+# Bulk decoding of bytes-like sources.
+# A single translate() maps every B41-BYTE to its value (0..40) and deletes
+# the bytes that b41d_filter would drop. The triplets are then combined into
+# UINT16s a chunk at a time with one overflow check per chunk.
+B41_VALUES = bytes(byte % 48 for byte in range(256))
+NON_B41 = bytes(byte for byte in range(256)
+    if not ((32 < byte < 127) and ((byte % 48) < 41)))
+
+class StrValues(dict):
+    'str.translate() table: B41-CHAR => chr(value); other chars are deleted.'
+    def __missing__(my, key):
+        return None
+
+B41_STR_VALUES = StrValues((byte, chr(byte % 48)) for byte in range(256)
+    if (32 < byte < 127) and ((byte % 48) < 41))
+
+def source_values(src):
+    'Filter a bytes-like or text source down to its B41 values (0..40).'
+    if isinstance(src, str):
+        return src.translate(B41_STR_VALUES).encode('ascii')
+    if not isinstance(src, (bytes, bytearray)):
+        src = bytes(src)
+    return src.translate(B41_VALUES, NON_B41)
+
+# Number of B41 values combined at a time by the bulk decoder
+BULK_VALUES = 3 * 0x8000
+
+def decode_values(values):
+    'Decode a buffer of B41 values (0..40) in bulk.'
+    if len(values) >= NUMPY_THRESHOLD and load_numpy():
+        return ndarray_decode_values(numpy.frombuffer(values, numpy.uint8)).tobytes()
+    length = len(values)
+    end = length - length % 3
+    chunks = []
+    for offset in range(0, end, BULK_VALUES):
+        chunk = values[offset:min(offset + BULK_VALUES, end)]
+        u16s = [lo + 41 * mid + 1681 * hi
+            for lo, mid, hi in zip(chunk[0::3], chunk[1::3], chunk[2::3])]
+        if max(u16s) >= 65536:
+            # report the first overflowing triplet as decode_triplet would
+            first = next(i for i, u16 in enumerate(u16s) if u16 >= 65536)
+            decode_triplet(bytearray(chunk[3 * first:3 * first + 3]))
+        chunks.append(struct.pack('>{0}H'.format(len(u16s)), *u16s))
+    trailing = bytearray(values[end:])
+    if len(trailing) == 2:
+        chunks.append(bytes((decode_double(trailing),)))
+    elif len(trailing) == 1:
+        chunks.append(bytes((decode_single(trailing),)))
+    return b''.join(chunks)
+
+# Short text (URL path segments, filenames, etc) is decoded a triplet at a
+# time by looking each one up, which avoids translating the whole text.
+# Texts longer than this are cheaper to translate.
+TEXT_THRESHOLD = 192
+
+# B41 triplet (as text) => octet-pair; built on first use.
+g_text_pairs = {}
+
+def text_pair_table():
+    'Return the table of B41 triplet (as text) => octet-pair.'
+    if not g_text_pairs:
+        pack = struct.Struct('>H').pack
+        g_text_pairs.update(dict((triplet.decode('ascii'), pack(u16))
+            for u16, triplet in enumerate(triplet_table())))
+    return g_text_pairs
+
+# The B41-BYTEs and B41-CHARs, for deleting them in order to find the rest
+B41_BYTES = bytes(byte for byte in range(256)
+    if (32 < byte < 127) and ((byte % 48) < 41))
+B41_STR_DELETIONS = dict.fromkeys(bytearray(B41_BYTES))
+
+def b41validate(src):
+    '''Find the first byte (or char) of a source that is not base41.
+
+    b41decode silently drops these (unless strict); this checks the whole
+    source in one pass. Returns the offset, or -1 if every byte is base41.
+    '''
+    if isinstance(src, str):
+        rest = src.translate(B41_STR_DELETIONS)
+    else:
+        if not isinstance(src, (bytes, bytearray)):
+            src = bytes(src)
+        rest = src.translate(None, B41_BYTES)
+    # the first byte that survived is the first one that isn't base41
+    return src.find(rest[:1]) if rest else -1
+
+def check_strict(src, start=0):
+    '''Raise an InvalidCharError if any byte (or char) of a source is not base41.
+
+    `start` is the offset of the source within a larger one, for reporting.
+    '''
+    offset = b41validate(src)
+    if offset >= 0:
+        msg = 'non-base41 byte {0!r} at offset {1}'
+        byte = src[offset:offset + 1]
+        raise InvalidCharError(msg.format(byte, start + offset), start + offset)
+
+def decode_text(src):
+    'Decode base41-encoded text (in bulk).'
+    length = len(src)
+    if length <= TEXT_THRESHOLD:
+        end = length - length % 3
+        table = text_pair_table()
+        try:
+            # only standard B41-CHARs without punctuation will be found
+            pairs = [table[src[start:start + 3]] for start in range(0, end, 3)]
+        except KeyError:
+            pass
+        else:
+            if end == length:
+                return b''.join(pairs)
+            trailing = source_values(src[end:])
+            if len(trailing) == length - end:
+                pairs.append(decode_values(trailing))
+                return b''.join(pairs)
+    return decode_values(source_values(src))
+
+def decode_buffer(src):
+    'Decode a base41-encoded bytes-like or text source (in bulk).'
+    if isinstance(src, str):
+        return decode_text(src)
+    return decode_values(source_values(src))
+
+def b41decode(src, strict=False):
+    '''Decode a base41-encoded byte (or text) source.
+
+    Bytes that aren't base41 are dropped, unless `strict` in which case an
+    InvalidCharError is raised with the offset of the first one.
+    '''
+    if strict:
+        if not isinstance(src, BULK_TYPES + (str,)):
+            src = bytearray(src)
+        check_strict(src)
+    if isinstance(src, BULK_TYPES + (str,)):
+        return decode_buffer(src)
+    return bytes(byt for byt in B41Decoder(src))
 
 
 class B41U16Decoder(object):
@@ -217,12 +427,1165 @@ class B41U16Decoder(object):
         # MANY b41-triplet => MANY UINT16
         acc = bytearray()
         while True:
-            acc.append(next(my.src))
-            acc.append(next(my.src))
-            acc.append(next(my.src))
+            try:
+                acc.append(next(my.src))
+                acc.append(next(my.src))
+                acc.append(next(my.src))
+            except StopIteration:
+                break
             u16 = decode_triplet(acc)
             acc = bytearray()
             yield u16
         # Trailing bytes not allowed
         assert len(acc) == 0, 'Trailing bytes while decoding to UINT16'
 
+
+#   _______________
+# _| UINT16 ARRAYS |__________________________________________________________
+
+# Bulk equivalents of B41U16Encoder/B41U16Decoder for array('H') and other
+# buffers of UINT16s.
+BYTEORDERS = {'native': '=', 'big': '>', 'little': '<'}
+
+def b41encode_u16_array(src, byteorder='native'):
+    '''Encode a buffer (e.g. array('H')) of UINT16s using base41 encoding.
+
+    `byteorder` is that of the UINT16s in the buffer: native, big or little.
+    Any other iterable of ints is converted to an array('H') first.
+    '''
+    order = BYTEORDERS[byteorder]
+    if isinstance(src, array.array):
+        if src.itemsize != 2:
+            raise TypeError('expected an array of UINT16s, not ' + src.typecode)
+    elif not isinstance(src, BULK_TYPES):
+        src = array.array('H', src)
+        order = '='
+    octets = octet_view(src)
+    if len(octets) % 2:
+        raise ValueError('a buffer of UINT16s must have an even length')
+    if len(octets) >= NUMPY_THRESHOLD and load_numpy():
+        u16s = numpy.frombuffer(octets, numpy.dtype(numpy.uint16).newbyteorder(order))
+        return u16_ndarray_encode(u16s).tobytes()
+    return b''.join(encode_pairs(octets, len(octets), triplet_table(), order))
+
+def b41decode_u16_array(src):
+    'Decode a base41-encoded byte (or text) source to an array of UINT16s.'
+    values = source_values(src)
+    if len(values) % 3:
+        raise ValueError('Trailing bytes while decoding to UINT16')
+    u16s = array.array('H')
+    u16s.frombytes(decode_values(values))
+    if sys.byteorder == 'little':
+        u16s.byteswap()
+    return u16s
+
+#   ______________
+# _| INTS & UUIDS |___________________________________________________________
+
+# Ints are encoded as big-endian octets (so that the results are identical
+# to b41encode(n.to_bytes(width, 'big'))) but straight from the int's
+# UINT16s, without building the octets.
+
+def b41encode_int(n, width=None):
+    '''Encode a non-negative int as `width` big-endian octets using base41.
+
+    `width` defaults to the fewest octets that hold `n` (at least one).
+    '''
+    if n < 0:
+        raise ValueError('cannot encode a negative int ({0})'.format(n))
+    if width is None:
+        width = max(1, (n.bit_length() + 7) // 8)
+    elif n >> (8 * width):
+        raise OverflowError('int too big to encode in {0} octets'.format(width))
+    table = triplet_table()
+    tail = b''
+    if width & 1:
+        tail = encode_trailing(n & 0xff)
+        n >>= 8
+    count = width // 2
+    triplets = [None] * count
+    for index in range(count - 1, -1, -1):
+        n, u16 = divmod(n, 65536)
+        triplets[index] = table[u16]
+    triplets.append(tail)
+    return b''.join(triplets)
+
+def b41decode_int(src):
+    'Decode a base41-encoded byte (or text) source to an int (big-endian).'
+    return int.from_bytes(b41decode(src), 'big')
+
+def b41encode_uuid(u):
+    'Encode a UUID using base41 (identical to b41encode(u.bytes)).'
+    n = u.int
+    table = triplet_table()
+    return b''.join((
+        table[n >> 112],
+        table[n >> 96 & 0xffff],
+        table[n >> 80 & 0xffff],
+        table[n >> 64 & 0xffff],
+        table[n >> 48 & 0xffff],
+        table[n >> 32 & 0xffff],
+        table[n >> 16 & 0xffff],
+        table[n & 0xffff],
+    ))
+
+def b41decode_uuid(src):
+    'Decode a base41-encoded byte (or text) source to a UUID.'
+    return uuid.UUID(bytes=b41decode(src))
+
+#   _________
+# _| CHECKED |________________________________________________________________
+
+# A framed token format: the base41 encoding of the payload followed by a
+# B41 triplet of the payload's CRC-16/8005 (see crc16_8005.py).
+# The CRC is computed in the same pass as the encoding (or decoding) by
+# feeding it each big-endian UINT16 with a 65536-entry table that does two
+# octets of the CRC at once. So that the UINT16 can be XORed straight in,
+# the running remainder is kept byte-swapped.
+# The fused pass only pays for short tokens: longer payloads are quicker
+# encoded (or decoded) by the bulk paths (or NumPy backend) and then
+# CRC-ed by crc16_8005's slicing-by-8.
+CHECKED_FUSED_MAX = 16384
+
+def fused_checked(length):
+    'Whether to CRC a payload of `length` octets in the same pass.'
+    if length < NUMPY_THRESHOLD:
+        return True
+    return length < CHECKED_FUSED_MAX and load_numpy() is None
+
+class ChecksumError(ValueError):
+    'CRC mismatch while decoding a checked base41 token.'
+    def __init__(self, *args):
+        super(ChecksumError, self).__init__(*args)
+
+g_crc_pairs = []
+
+def crc_pair_table():
+    'Return the table of (byte-swapped remainder ^ UINT16) => next remainder.'
+    if not g_crc_pairs:
+        table = crc16_8005.g_crcTable
+        pairs = []
+        for u16 in range(65536):
+            # octet u16 >> 8 then octet u16 & 0xff, from a zero remainder
+            first = table[u16 >> 8]
+            remainder = table[(u16 ^ first) & 0xff] ^ (first >> 8)
+            pairs.append((remainder >> 8) | (remainder & 0xff) << 8)
+        g_crc_pairs[:] = pairs
+    return g_crc_pairs
+
+def crc_trailing(swapped, octet):
+    'Feed an odd trailing octet to a byte-swapped remainder; return the CRC.'
+    remainder = (swapped >> 8) | (swapped & 0xff) << 8
+    return crc16_8005.g_crcTable[(octet ^ remainder) & 0xff] ^ (remainder >> 8)
+
+def b41encode_checked(src):
+    'Encode a byte source with base41 and append its CRC-16/8005 as a triplet.'
+    if not isinstance(src, BULK_TYPES):
+        src = bytearray(src)
+    octets = octet_view(src)
+    length = len(octets)
+    triplets = triplet_table()
+    if not fused_checked(length):
+        return encode_buffer(octets) + triplets[crc16_8005.crc16_8005(octets)]
+    end = length & ~1
+    crc_pairs = crc_pair_table()
+    swapped = 0
+    chunks = []
+    for offset in range(0, end, BULK_CHUNK):
+        count = min(BULK_CHUNK, end - offset) // 2
+        encoded = []
+        append = encoded.append
+        for u16 in struct.unpack_from('>{0}H'.format(count), octets, offset):
+            swapped = crc_pairs[swapped ^ u16]
+            append(triplets[u16])
+        chunks.append(b''.join(encoded))
+    if length & 1:
+        octet = bytearray(octets[end:])[0]
+        chunks.append(encode_trailing(octet))
+        crc = crc_trailing(swapped, octet)
+    else:
+        crc = (swapped >> 8) | (swapped & 0xff) << 8
+    chunks.append(triplets[crc])
+    return b''.join(chunks)
+
+def decode_values_crc(values, end):
+    'Decode B41 values and CRC the payload in the same pass.'
+    crc_pairs = crc_pair_table()
+    swapped = 0
+    u16s = []
+    append = u16s.append
+    for lo, mid, hi in zip(values[0:end:3], values[1:end:3], values[2:end:3]):
+        u16 = lo + 41 * mid + 1681 * hi
+        if u16 >= 65536:
+            decode_triplet(bytearray((lo, mid, hi)))
+        swapped = crc_pairs[swapped ^ u16]
+        append(u16)
+    decoded = struct.pack('>{0}H'.format(len(u16s)), *u16s)
+    if len(values) > end:
+        trailing = decode_values(values[end:])
+        decoded += trailing
+        return decoded, crc_trailing(swapped, bytearray(trailing)[0])
+    return decoded, (swapped >> 8) | (swapped & 0xff) << 8
+
+def b41decode_checked(src):
+    '''Decode a checked base41 token, verifying its CRC-16/8005.
+
+    Raises a ChecksumError if the CRC doesn't match.
+    '''
+    if not isinstance(src, BULK_TYPES + (str,)):
+        src = bytearray(src)
+    values = source_values(src)
+    if len(values) < 3:
+        raise ValueError('a checked base41 token needs at least three bytes')
+    expected = decode_triplet(bytearray(values[-3:]))
+    values = values[:-3]
+    length = len(values)
+    end = length - length % 3
+    if fused_checked(end // 3 * 2):
+        decoded, crc = decode_values_crc(values, end)
+    else:
+        decoded = decode_values(values)
+        crc = crc16_8005.crc16_8005(decoded)
+    if crc != expected:
+        msg = 'CRC mismatch: token has {0:#06x} but payload gives {1:#06x}'
+        raise ChecksumError(msg.format(expected, crc))
+    return decoded
+
+#   _______
+# _| CACHE |__________________________________________________________________
+
+B41CacheInfo = collections.namedtuple('B41CacheInfo',
+    'hits misses evictions maxsize currsize')
+
+class B41Cache(object):
+    '''Bounded LRU cache of the results of a base41 function.
+
+    Only sources of up to `maxlen` bytes (or chars) are cached; longer ones
+    (and sources without a length) are passed straight to the function.
+    The cache is thread-safe so it can be shared; see cache_info() for the
+    hit, miss and eviction counts.
+    '''
+    def __init__(my, function, maxsize=4096, maxlen=64):
+        my.function = function
+        my.maxsize = maxsize
+        my.maxlen = maxlen
+        my.cache = collections.OrderedDict()
+        my.lock = threading.Lock()
+        my.hits = my.misses = my.evictions = 0
+    def __call__(my, src):
+        try:
+            if len(src) > my.maxlen:
+                return my.function(src)
+        except TypeError:
+            return my.function(src)
+        key = src if isinstance(src, (bytes, str)) else bytes(src)
+        with my.lock:
+            result = my.cache.get(key)
+            if result is not None:
+                my.cache.move_to_end(key)
+                my.hits += 1
+                return result
+            my.misses += 1
+        result = my.function(key)
+        with my.lock:
+            my.cache[key] = result
+            if len(my.cache) > my.maxsize:
+                my.cache.popitem(last=False)
+                my.evictions += 1
+        return result
+    def cache_info(my):
+        'Return the hit, miss and eviction counts and the sizes of the cache.'
+        with my.lock:
+            return B41CacheInfo(my.hits, my.misses, my.evictions,
+                my.maxsize, len(my.cache))
+    def cache_clear(my):
+        'Empty the cache and reset its counters.'
+        with my.lock:
+            my.cache.clear()
+            my.hits = my.misses = my.evictions = 0
+
+def cached_encoder(maxsize=4096, maxlen=64):
+    'Return a B41Cache of b41encode for sources of up to `maxlen` octets.'
+    return B41Cache(b41encode, maxsize, maxlen)
+
+def cached_decoder(maxsize=4096, maxlen=96):
+    'Return a B41Cache of b41decode for sources of up to `maxlen` bytes.'
+    return B41Cache(b41decode, maxsize, maxlen)
+
+#   _________
+# _| BUFFERS |________________________________________________________________
+
+def b41_encoded_length(length, last=None):
+    '''Size of the base41 encoding of `length` octets.
+
+    An odd trailing octet encodes to one or two B41-BYTEs depending on its
+    value, `last`; if that isn't given, the maximum size is returned.
+    '''
+    size = length // 2 * 3
+    if length & 1:
+        size += 1 if last is not None and last < 41 else 2
+    return size
+
+def b41_decoded_length(encoded):
+    '''Size of the decoding of a base41-encoded source.
+
+    `encoded` is either a bytes-like source or a count of B41-BYTEs.
+    '''
+    if isinstance(encoded, int):
+        length = encoded
+    else:
+        length = len(source_values(encoded))
+    return length // 3 * 2 + (1 if length % 3 else 0)
+
+def writable_view(buf, offset, size):
+    'View `size` octets of a writable buffer from `offset`.'
+    view = memoryview(buf)
+    if view.ndim != 1 or view.itemsize != 1:
+        view = view.cast('B')
+    if offset < 0 or offset + size > len(view):
+        msg = 'buffer too small: {0} bytes needed at offset {1} of {2}'
+        raise ValueError(msg.format(size, offset, len(view)))
+    return view[offset:offset + size]
+
+def b41encode_into(src, out_buffer, offset=0):
+    '''Encode a byte source into a writable buffer at `offset`.
+
+    Returns the number of bytes written.
+    '''
+    if not isinstance(src, BULK_TYPES):
+        src = b41encode(src)
+        out = writable_view(out_buffer, offset, len(src))
+        out[:] = src
+        return len(src)
+    octets = octet_view(src)
+    length = len(octets)
+    last = octets[length - 1] if length else None
+    size = b41_encoded_length(length, last)
+    out = writable_view(out_buffer, offset, size)
+    for start in range(0, length, BULK_CHUNK):
+        chunk = encode_buffer(octets[start:start + BULK_CHUNK])
+        out[start // 2 * 3:start // 2 * 3 + len(chunk)] = chunk
+    return size
+
+def b41decode_into(src, out_buffer, offset=0):
+    '''Decode a base41-encoded byte source into a writable buffer at `offset`.
+
+    Returns the number of bytes written.
+    '''
+    if not isinstance(src, BULK_TYPES + (str,)):
+        src = bytearray(src)
+    values = source_values(src)
+    size = b41_decoded_length(len(values))
+    out = writable_view(out_buffer, offset, size)
+    for start in range(0, len(values), BULK_VALUES):
+        chunk = decode_values(values[start:start + BULK_VALUES])
+        out[start // 3 * 2:start // 3 * 2 + len(chunk)] = chunk
+    return size
+
+#   __________
+# _| SORTABLE |_______________________________________________________________
+
+# A variant of base41 whose encodings sort in the same order as the octets
+# they encode, for use as index keys, filenames in directory listings, etc.
+# Each triplet is written most-significant char first using an alphabet that
+# is in ASCII order. A trailing octet b must sort after every pair (b-1, x)
+# and before every pair (b, x); as consecutive pairs have consecutive triplets
+# there is no room for two chars in between, so b is written as the triplet
+# of the pair (b-1, 255) followed by 'p', the greatest char (a pair's triplet
+# never starts with it), or as '0' (a prefix of every triplet of (0, x)) when
+# b is 0. So keys of any length sort as their encodings do, and the encoding
+# of a key is a prefix of the encoding of every key that starts with it.
+# An odd-length key ends with either 1 or 4 chars, its length % 3 being 1.
+# Note: the sortable alphabet doesn't obey the rule (byte % 48) == value,
+# so there are no alternative chars and no punctuation is dropped silently
+# (other than what's not in the alphabet).
+SORTABLE_ALFA = bytearray(b'0123456789ABCDEFGHIJKLMNOPQRSTUVWXjklmnop')
+
+# Sortable B41-BYTE => value (0..40); every other byte is deleted
+SORTABLE_VALUES = bytes.maketrans(bytes(SORTABLE_ALFA), bytes(range(41)))
+NON_SORTABLE = bytes(
+    byte for byte in range(256) if byte not in SORTABLE_ALFA)
+SORTABLE_STR_VALUES = StrValues(
+    (byte, chr(value)) for value, byte in enumerate(SORTABLE_ALFA))
+
+g_sortable_triplets = []
+
+def sortable_triplet_table():
+    'Return the table of UINT16 => sortable B41 triplet (high-order first).'
+    if not g_sortable_triplets:
+        chars = [bytes(SORTABLE_ALFA[i:i+1]) for i in range(41)]
+        triplets = (hi + mid + lo for hi in chars for mid in chars for lo in chars)
+        g_sortable_triplets[:] = [
+            triplet for _, triplet in zip(range(65536), triplets)]
+    return g_sortable_triplets
+
+def b41encode_sortable(src):
+    'Encode a byte source using the sortable base41 variant.'
+    if not isinstance(src, BULK_TYPES):
+        src = bytearray(src)
+    octets = octet_view(src)
+    length = len(octets)
+    end = length & ~1
+    chunks = encode_pairs(octets, end, sortable_triplet_table())
+    if length & 1:
+        octet = bytearray(octets[end:])[0]
+        if octet:
+            chunks.append(sortable_triplet_table()[(octet << 8) - 1] + b'p')
+        else:
+            chunks.append(b'0')
+    return b''.join(chunks)
+
+def b41decode_sortable(src):
+    'Decode a byte (or text) source encoded with the sortable base41 variant.'
+    if isinstance(src, str):
+        values = src.translate(SORTABLE_STR_VALUES).encode('ascii')
+    else:
+        values = bytes(src).translate(SORTABLE_VALUES, NON_SORTABLE)
+    length = len(values)
+    if length % 3 == 2:
+        raise ValueError('two trailing bytes are not valid sortable base41')
+    # '0' or the triplet of (b-1, 255) then 'p' (value 40)
+    trailing = bytearray(values[-1:] if length % 3 else b'')
+    if trailing and trailing[0] not in (0, 40):
+        raise ValueError('a trailing octet must end with 0 or p')
+    end = length - len(trailing)
+    if trailing == b'\x28' and not end:
+        raise ValueError('a trailing p needs a triplet before it')
+    # swap each triplet to low-order first and decode as standard base41
+    triplets = bytearray(values[:end])
+    triplets[0::3], triplets[2::3] = triplets[2::3], triplets[0::3]
+    decoded = decode_values(triplets)
+    if trailing == b'\x28':
+        u16 = struct.unpack('>H', decoded[-2:])[0]
+        decoded = decoded[:-2]
+        if u16 & 0xff != 0xff:
+            raise ValueError('the triplet before a trailing p must end in ff')
+        decoded += bytes((u16 + 1 >> 8,))
+    elif trailing:
+        decoded += b'\x00'
+    return decoded
+
+#   _______
+# _| BATCH |__________________________________________________________________
+
+# Sources of an even length encode independently of whatever precedes them,
+# so a batch of them can be joined, encoded in one go and then sliced apart.
+# Likewise for encodings whose B41-BYTEs are a whole number of triplets.
+
+def b41encode_many(srcs):
+    '''Encode many byte sources using base41 encoding.
+
+    Returns a list of the encodings, in the same order as the sources.
+    '''
+    srcs = list(srcs)
+    if all(isinstance(src, bytes) and len(src) == 16 for src in srcs):
+        # fixed-length path for UUIDs etc: 16 octets => 24 B41-BYTEs
+        encoded = encode_buffer(b''.join(srcs))
+        return [encoded[start:start + 24] for start in range(0, len(encoded), 24)]
+    results = [None] * len(srcs)
+    evens = [index for index, src in enumerate(srcs)
+        if isinstance(src, (bytes, bytearray)) and not len(src) & 1]
+    encoded = encode_buffer(b''.join([srcs[index] for index in evens]))
+    start = 0
+    for index in evens:
+        end = start + len(srcs[index]) // 2 * 3
+        results[index] = encoded[start:end]
+        start = end
+    for index, result in enumerate(results):
+        if result is None:
+            results[index] = b41encode(srcs[index])
+    return results
+
+def b41decode_many(srcs):
+    '''Decode many base41-encoded byte sources.
+
+    Returns a list of the decodings, in the same order as the sources.
+    '''
+    srcs = list(srcs)
+    results = [None] * len(srcs)
+    values = [None] * len(srcs)
+    for index, src in enumerate(srcs):
+        if isinstance(src, (bytes, bytearray, str)):
+            values[index] = source_values(src)
+    if all(value is not None and len(value) == 24 for value in values):
+        # fixed-length path for UUIDs etc: 24 B41-BYTEs => 16 octets
+        decoded = decode_values(b''.join(values))
+        return [decoded[start:start + 16] for start in range(0, len(decoded), 16)]
+    wholes = [index for index, value in enumerate(values)
+        if value is not None and not len(value) % 3]
+    decoded = decode_values(b''.join([values[index] for index in wholes]))
+    start = 0
+    for index in wholes:
+        end = start + len(values[index]) // 3 * 2
+        results[index] = decoded[start:end]
+        start = end
+    for index, result in enumerate(results):
+        if result is None:
+            results[index] = b41decode(srcs[index])
+    return results
+
+#   _________
+# _| STREAMS |________________________________________________________________
+
+# Number of octets (or encoded bytes) handled at a time by the stream classes
+STREAM_CHUNK = 0x10000
+
+class B41EncodingWriter(io.RawIOBase):
+    '''Writable stream that base41-encodes onto another binary stream.
+
+    Octets are encoded in chunks of `chunk_size` (which must be even) and
+    the odd trailing octet is held back until close(). Closing the writer
+    does not close the underlying stream.
+    '''
+    def __init__(my, raw, chunk_size=STREAM_CHUNK):
+        if chunk_size < 2 or chunk_size % 2:
+            raise ValueError('chunk_size must be a positive even number')
+        my.raw = raw
+        my.chunk_size = chunk_size
+        # octets that don't (yet) make a whole chunk
+        my.pending = bytearray()
+    def writable(my):
+        return True
+    def write(my, data):
+        if my.closed:
+            raise ValueError('write to closed file')
+        octets = octet_view(data)
+        length = len(octets)
+        start = 0
+        if my.pending:
+            # top up the pending octets to a whole chunk
+            start = min(length, my.chunk_size - len(my.pending))
+            my.pending += octets[:start]
+            if len(my.pending) < my.chunk_size:
+                return length
+            my.raw.write(encode_buffer(my.pending))
+            my.pending = bytearray()
+        end = start + (length - start) // my.chunk_size * my.chunk_size
+        for offset in range(start, end, my.chunk_size):
+            my.raw.write(encode_buffer(octets[offset:offset + my.chunk_size]))
+        my.pending += octets[end:]
+        return length
+    def flush(my):
+        # pairs of octets can be encoded early, but not the odd octet
+        if not my.closed:
+            end = len(my.pending) & ~1
+            if end:
+                my.raw.write(encode_buffer(my.pending[:end]))
+                del my.pending[:end]
+            my.raw.flush()
+    def close(my):
+        if not my.closed:
+            my.raw.write(encode_buffer(my.pending))
+            my.pending = bytearray()
+            my.raw.flush()
+        super(B41EncodingWriter, my).close()
+
+class B41DecodingReader(io.RawIOBase):
+    '''Readable stream that decodes a base41-encoded binary stream.
+
+    The encoded stream is read in chunks of `chunk_size`; a partial triplet
+    at the end of a chunk is carried over to the next one. Closing the
+    reader does not close the underlying stream.
+    '''
+    def __init__(my, raw, chunk_size=STREAM_CHUNK):
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+        my.raw = raw
+        my.chunk_size = chunk_size
+        my.decoder = B41IncrementalDecoder()
+        # decoded octets not yet read
+        my.decoded = bytearray()
+        my.eof = False
+    def readable(my):
+        return True
+    def fill(my):
+        'Decode the next chunk of the underlying stream.'
+        chunk = my.raw.read(my.chunk_size)
+        my.eof = not chunk
+        my.decoded += my.decoder.decode(chunk, final=my.eof)
+    def readinto(my, buf):
+        if my.closed:
+            raise ValueError('read from closed file')
+        while not my.decoded and not my.eof:
+            my.fill()
+        view = octet_view(buf)
+        count = min(len(view), len(my.decoded))
+        view[:count] = my.decoded[:count]
+        del my.decoded[:count]
+        return count
+
+class B41SeekableReader(io.RawIOBase):
+    '''Seekable, readable view of the decoding of a base41-encoded stream.
+
+    Every three B41-BYTEs decode to two octets, so octet N of the decoding
+    is in the triplet at offset N // 2 * 3 of the encoding; only the
+    triplets needed for each read are decoded. `raw` is a seekable binary
+    file or an mmap and every byte of it must be a B41-BYTE (no whitespace
+    or other punctuation). Closing the reader does not close `raw`.
+    '''
+    def __init__(my, raw):
+        my.raw = raw
+        my.raw.seek(0, io.SEEK_END)
+        my.encoded_size = my.raw.tell()
+        my.size = b41_decoded_length(my.encoded_size)
+        my.pos = 0
+    def readable(my):
+        return True
+    def seekable(my):
+        return True
+    def tell(my):
+        return my.pos
+    def seek(my, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = my.pos + offset
+        elif whence == io.SEEK_END:
+            pos = my.size + offset
+        else:
+            raise ValueError('invalid whence ({0})'.format(whence))
+        if pos < 0:
+            raise ValueError('negative seek position {0}'.format(pos))
+        my.pos = pos
+        return pos
+    def readinto(my, buf):
+        if my.closed:
+            raise ValueError('read from closed file')
+        view = octet_view(buf)
+        count = max(0, min(len(view), my.size - my.pos))
+        if not count:
+            return 0
+        # the triplets that hold octets pos .. pos+count-1
+        first = my.pos // 2
+        last = (my.pos + count - 1) // 2
+        start = first * 3
+        my.raw.seek(start)
+        encoded = my.raw.read(min(last * 3 + 3, my.encoded_size) - start)
+        check_strict(encoded, start)
+        values = source_values(encoded)
+        skip = my.pos - first * 2
+        view[:count] = decode_values(values)[skip:skip + count]
+        my.pos += count
+        return count
+
+#   ________
+# _| CODECS |_________________________________________________________________
+
+# Importing this module registers 'base41' with the codecs machinery
+# E.g.
+# >>> codecs.encode(b'John', 'base41')
+# b'Omk2Uo'
+
+class B41IncrementalEncoder(codecs.IncrementalEncoder):
+    'Incremental base41 encoder; the odd octet is held until final.'
+    def __init__(my, errors='strict'):
+        codecs.IncrementalEncoder.__init__(my, errors)
+        my.pending = b''
+    def encode(my, input, final=False):
+        # codecs.iterencode() finishes with encode('', True)
+        octets = octet_view(input or b'')
+        if my.pending:
+            octets = memoryview(my.pending + octets.tobytes())
+        end = len(octets) if final else len(octets) & ~1
+        my.pending = octets[end:].tobytes()
+        return encode_buffer(octets[:end])
+    def reset(my):
+        my.pending = b''
+    def getstate(my):
+        # 0 => nothing pending; 0x1nn => octet nn is pending
+        return 0x100 | bytearray(my.pending)[0] if my.pending else 0
+    def setstate(my, state):
+        my.pending = bytes((state & 0xff,)) if state else b''
+
+class B41IncrementalDecoder(codecs.IncrementalDecoder):
+    'Incremental base41 decoder; a partial triplet is held until final.'
+    def __init__(my, errors='strict'):
+        codecs.IncrementalDecoder.__init__(my, errors)
+        # B41 values of a partial triplet
+        my.values = b''
+    def decode(my, input, final=False):
+        values = my.values + source_values(input)
+        end = len(values) if final else len(values) - len(values) % 3
+        my.values = values[end:]
+        return decode_values(values[:end])
+    def reset(my):
+        my.values = b''
+    def getstate(my):
+        return (bytes(ALFA[value] for value in bytearray(my.values)), 0)
+    def setstate(my, state):
+        my.values = source_values(state[0])
+
+class B41StreamWriter(codecs.StreamWriter):
+    'Base41 StreamWriter; reset() writes out the odd octet, if any.'
+    def __init__(my, stream, errors='strict'):
+        codecs.StreamWriter.__init__(my, stream, errors)
+        my.encoder = B41IncrementalEncoder(errors)
+    def encode(my, input, errors='strict'):
+        return (my.encoder.encode(input), len(input))
+    def reset(my):
+        my.stream.write(my.encoder.encode(b'', final=True))
+
+class B41StreamReader(codecs.StreamReader):
+    'Base41 StreamReader; the trailing byte(s) are decoded at end of stream.'
+    charbuffertype = bytes
+    def __init__(my, stream, errors='strict'):
+        codecs.StreamReader.__init__(my, stream, errors)
+        my.decoder = B41IncrementalDecoder(errors)
+    def read(my, size=-1, chars=-1, firstline=False):
+        # as codecs.StreamReader: only return empty at end of stream
+        while chars < 0 or len(my.charbuffer) < chars:
+            data = my.stream.read() if size < 0 else my.stream.read(size)
+            final = size < 0 or not data
+            my.charbuffer += my.decoder.decode(data, final)
+            if final or (chars < 0 and my.charbuffer):
+                break
+        if chars < 0:
+            chars = len(my.charbuffer)
+        result = my.charbuffer[:chars]
+        my.charbuffer = my.charbuffer[chars:]
+        return result
+    def reset(my):
+        codecs.StreamReader.reset(my)
+        my.decoder.reset()
+
+def codec_encode(input, errors='strict'):
+    'Stateless base41 encoding for the codecs machinery.'
+    return (b41encode(input), len(input))
+
+def codec_decode(input, errors='strict'):
+    'Stateless base41 decoding for the codecs machinery.'
+    return (b41decode(input), len(input))
+
+def codec_search(name):
+    'Codec search function for base41.'
+    if name != 'base41':
+        return None
+    info = codecs.CodecInfo(
+        name='base41',
+        encode=codec_encode,
+        decode=codec_decode,
+        incrementalencoder=B41IncrementalEncoder,
+        incrementaldecoder=B41IncrementalDecoder,
+        streamwriter=B41StreamWriter,
+        streamreader=B41StreamReader,
+    )
+    # base41 is a bytes-to-bytes codec (like base64_codec)
+    info._is_text_encoding = False
+    return info
+
+codecs.register(codec_search)
+
+#   _________
+# _| ASYNCIO |________________________________________________________________
+
+class B41StreamCoder(object):
+    '''Base class of the asyncio stream encoder/decoder.
+
+    Reads `chunk_size` bytes at a time from an asyncio.StreamReader and
+    passes them through an incremental codec, which carries the odd octet
+    (or partial triplet) over to the next chunk. The results can be awaited
+    with read(), iterated with `async for`, or piped to an
+    asyncio.StreamWriter with pipe().
+    '''
+    coder_class = None
+    def __init__(my, reader, chunk_size=STREAM_CHUNK):
+        my.reader = reader
+        my.chunk_size = chunk_size
+        my.coder = my.coder_class()
+        my.eof = False
+    async def read(my):
+        'Return the next chunk of output (empty at the end).'
+        while not my.eof:
+            chunk = await my.reader.read(my.chunk_size)
+            my.eof = not chunk
+            output = my.code(chunk, my.eof)
+            if output:
+                return output
+        return b''
+    def __aiter__(my):
+        return my
+    async def __anext__(my):
+        output = await my.read()
+        if not output:
+            raise StopAsyncIteration
+        return output
+    async def pipe(my, writer):
+        '''Write all the output to an asyncio.StreamWriter.
+
+        Each chunk awaits writer.drain() so that a slow writer applies
+        back-pressure to the reading. Returns the number of bytes written.
+        '''
+        total = 0
+        async for output in my:
+            writer.write(output)
+            await writer.drain()
+            total += len(output)
+        return total
+
+class B41StreamEncoder(B41StreamCoder):
+    'Base41-encode an asyncio.StreamReader (see B41StreamCoder).'
+    coder_class = B41IncrementalEncoder
+    def code(my, chunk, final):
+        return my.coder.encode(chunk, final)
+
+class B41StreamDecoder(B41StreamCoder):
+    'Decode a base41-encoded asyncio.StreamReader (see B41StreamCoder).'
+    coder_class = B41IncrementalDecoder
+    def code(my, chunk, final):
+        return my.coder.decode(chunk, final)
+
+#   _______
+# _| FILES |__________________________________________________________________
+
+# Base41 is position-independent per octet-pair/B41-triplet, so a file can
+# be split into chunks that are encoded (or decoded) by separate processes,
+# each one writing its output at a precomputed offset in the output file.
+# Chunks must be a whole number of pairs (for encoding) and of triplets
+# (for decoding); the default size is both.
+PARALLEL_CHUNK = 6 << 20
+
+def encode_file_chunk(task):
+    'Encode one chunk of a file into its place in the output file.'
+    src_path, dst_path, offset, length = task
+    with open(src_path, 'rb') as src:
+        src.seek(offset)
+        octets = src.read(length)
+    with open(dst_path, 'r+b') as dst:
+        dst.seek(offset // 2 * 3)
+        dst.write(encode_buffer(octets))
+
+def decode_file_chunk(task):
+    'Decode one chunk of a file into its place in the output file.'
+    src_path, dst_path, offset, length = task
+    with open(src_path, 'rb') as src:
+        src.seek(offset)
+        encoded = src.read(length)
+    # offsets are only predictable if every byte is a B41-BYTE
+    check_strict(encoded, offset)
+    with open(dst_path, 'r+b') as dst:
+        dst.seek(offset // 3 * 2)
+        dst.write(decode_buffer(encoded))
+
+def run_file_chunks(function, tasks, workers):
+    'Run `function` over the chunk tasks, using a pool of `workers`.'
+    if workers == 1:
+        for task in tasks:
+            function(task)
+        return
+    pool = multiprocessing.Pool(workers)
+    try:
+        # in order, so a failure is that of the earliest failing chunk
+        # (e.g. the InvalidCharError of the first non-B41-BYTE)
+        for _ in pool.imap(function, tasks):
+            pass
+    except BaseException:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+def b41encode_file_parallel(src_path, dst_path, workers=None,
+                            chunk_size=PARALLEL_CHUNK):
+    '''Encode a file using base41 encoding, a chunk per process.
+
+    `workers` defaults to the number of CPUs; 1 means no process pool.
+    Returns the size of the encoded file.
+    '''
+    if chunk_size < 2 or chunk_size % 2:
+        raise ValueError('chunk_size must be a positive even number')
+    length = os.path.getsize(src_path)
+    last = 0
+    if length & 1:
+        with open(src_path, 'rb') as src:
+            src.seek(length - 1)
+            last = bytearray(src.read(1))[0]
+    size = b41_encoded_length(length, last)
+    with open(dst_path, 'wb') as dst:
+        dst.truncate(size)
+    tasks = [(src_path, dst_path, offset, chunk_size)
+        for offset in range(0, length, chunk_size)]
+    run_file_chunks(encode_file_chunk, tasks, workers)
+    return size
+
+def b41decode_file_parallel(src_path, dst_path, workers=None,
+                            chunk_size=PARALLEL_CHUNK):
+    '''Decode a base41-encoded file, a chunk per process.
+
+    Every byte of the input must be a B41-BYTE (no whitespace or other
+    punctuation) since the output offsets are calculated from the input
+    offsets. `workers` defaults to the number of CPUs; 1 means no process
+    pool. Returns the size of the decoded file.
+    '''
+    if chunk_size < 3 or chunk_size % 3:
+        raise ValueError('chunk_size must be a positive multiple of 3')
+    length = os.path.getsize(src_path)
+    size = b41_decoded_length(length)
+    with open(dst_path, 'wb') as dst:
+        dst.truncate(size)
+    tasks = [(src_path, dst_path, offset, chunk_size)
+        for offset in range(0, length, chunk_size)]
+    run_file_chunks(decode_file_chunk, tasks, workers)
+    return size
+
+def b41encode_file(src_path, dst_path):
+    '''Encode a file using base41 encoding, via memory maps.
+
+    The output file is sized up front and filled in place a chunk at a
+    time, so neither file is ever read into memory as a whole.
+    Returns the size of the encoded file.
+    '''
+    with open(src_path, 'rb') as src, open(dst_path, 'w+b') as dst:
+        length = os.fstat(src.fileno()).st_size
+        if not length:
+            return 0
+        with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as octets:
+            size = b41_encoded_length(length, octets[length - 1])
+            dst.truncate(size)
+            with mmap.mmap(dst.fileno(), size) as encoded:
+                b41encode_into(octets, encoded)
+    return size
+
+def b41decode_file(src_path, dst_path):
+    '''Decode a base41-encoded file, via memory maps.
+
+    The input is scanned once to count its B41-BYTEs (which sizes the
+    output file) and then decoded into the output file a chunk at a time.
+    Returns the size of the decoded file.
+    '''
+    with open(src_path, 'rb') as src, open(dst_path, 'w+b') as dst:
+        length = os.fstat(src.fileno()).st_size
+        if not length:
+            return 0
+        with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as encoded:
+            offsets = range(0, length, STREAM_CHUNK)
+            count = sum(len(encoded[offset:offset + STREAM_CHUNK].translate(
+                None, NON_B41)) for offset in offsets)
+            size = b41_decoded_length(count)
+            if not size:
+                return 0
+            dst.truncate(size)
+            with mmap.mmap(dst.fileno(), size) as octets:
+                decoder = B41IncrementalDecoder()
+                start = 0
+                for offset in offsets:
+                    final = offset + STREAM_CHUNK >= length
+                    chunk = decoder.decode(
+                        encoded[offset:offset + STREAM_CHUNK], final)
+                    octets[start:start + len(chunk)] = chunk
+                    start += len(chunk)
+    return size
+
+#   _______________
+# _| NUMPY BACKEND |__________________________________________________________
+
+# When NumPy is available, large buffers are encoded and decoded with array
+# operations instead of the pure-Python bulk paths above.
+# Buffers shorter than this are cheaper to do in pure Python.
+NUMPY_THRESHOLD = 512
+
+# Importing NumPy takes longer than encoding a short token, so it is put
+# off until the first buffer of NUMPY_THRESHOLD bytes (or ndarray call).
+# [NumPy module or None] once the import has been tried
+g_numpy = []
+
+def load_numpy():
+    'Import NumPy and build the backend tables (once); None if not installed.'
+    global numpy, ALFA_NDARRAY, VALUE_NDARRAY
+    if not g_numpy:
+        try:
+            import numpy as module
+        except ImportError:
+            module = None
+        if module is not None:
+            ALFA_NDARRAY = module.frombuffer(bytes(ALFA), module.uint8)
+            # B41-BYTE => value (0..40); every other byte => 0xff
+            VALUE_NDARRAY = module.frombuffer(B41_VALUES, module.uint8).copy()
+            VALUE_NDARRAY[module.frombuffer(NON_B41, module.uint8)] = 0xff
+            numpy = module
+        g_numpy.append(module)
+    return g_numpy[0]
+
+def require_numpy():
+    'Raise an ImportError if NumPy is unavailable.'
+    if load_numpy() is None:
+        raise ImportError('the base41 NumPy backend requires numpy')
+
+def as_octet_ndarray(src):
+    'View a bytes-like source or NumPy array as a flat uint8 array.'
+    if isinstance(src, numpy.ndarray):
+        if src.dtype != numpy.uint8:
+            raise TypeError('expected an array of uint8, not {0}'.format(
+                src.dtype))
+        return numpy.ascontiguousarray(src).reshape(-1)
+    return numpy.frombuffer(octet_view(src), numpy.uint8)
+
+def is_u16_ndarray(src):
+    'Whether `src` is a NumPy array of UINT16s (of either byte order).'
+    return (isinstance(src, numpy.ndarray) and src.dtype.kind == 'u'
+        and src.dtype.itemsize == 2)
+
+def u16_ndarray_encode(u16s):
+    'MANY UINT16 => MANY B41-char (as a uint8 array).'
+    himid, lo = numpy.divmod(u16s, 41)
+    hi, mid = numpy.divmod(himid, 41)
+    encoded = numpy.empty((len(u16s), 3), numpy.uint8)
+    encoded[:, 0] = ALFA_NDARRAY[lo]
+    encoded[:, 1] = ALFA_NDARRAY[mid]
+    encoded[:, 2] = ALFA_NDARRAY[hi]
+    return encoded.reshape(-1)
+
+def ndarray_values(src):
+    'Filter a base41-encoded source down to a uint8 array of B41 values.'
+    values = VALUE_NDARRAY[as_octet_ndarray(src)]
+    return values[values != 0xff]
+
+def u16_ndarray_decode(values):
+    'MANY b41-triplet (as B41 values) => MANY UINT16 (as a uint32 array).'
+    triplets = values.reshape(-1, 3).astype(numpy.uint32)
+    u16s = triplets[:, 0] + 41 * triplets[:, 1] + 1681 * triplets[:, 2]
+    if len(u16s) and u16s.max() >= 65536:
+        first = numpy.argmax(u16s >= 65536)
+        decode_triplet(bytearray(triplets[first].astype(numpy.uint8).tobytes()))
+    return u16s
+
+def b41encode_ndarray(src):
+    '''Encode a uint8 array (or bytes-like source) to a uint8 array of base41.
+
+    An array of UINT16s is encoded by value, as by b41encode_u16_ndarray;
+    arrays of any other dtype raise a TypeError.
+    '''
+    require_numpy()
+    if is_u16_ndarray(src):
+        return u16_ndarray_encode(src.reshape(-1))
+    octets = as_octet_ndarray(src)
+    end = len(octets) & ~1
+    encoded = u16_ndarray_encode(octets[:end].view('>u2'))
+    if len(octets) & 1:
+        trailing = encode_trailing(int(octets[end]))
+        encoded = numpy.concatenate(
+            (encoded, numpy.frombuffer(trailing, numpy.uint8)))
+    return encoded
+
+def ndarray_decode_values(values):
+    'Decode a uint8 array of B41 values (0..40) to a uint8 array.'
+    end = len(values) - len(values) % 3
+    u16s = u16_ndarray_decode(values[:end])
+    decoded = u16s.astype('>u2').view(numpy.uint8)
+    trailing = bytearray(values[end:].tobytes())
+    if len(trailing) == 2:
+        decoded = numpy.append(decoded, numpy.uint8(decode_double(trailing)))
+    elif len(trailing) == 1:
+        decoded = numpy.append(decoded, numpy.uint8(decode_single(trailing)))
+    return decoded
+
+def b41decode_ndarray(src):
+    'Decode a base41-encoded uint8 array (or bytes-like source) to uint8s.'
+    require_numpy()
+    return ndarray_decode_values(ndarray_values(src))
+
+def b41encode_u16_ndarray(src):
+    'Encode an array of UINT16s to a uint8 array of base41 (cf B41U16Encoder).'
+    require_numpy()
+    if is_u16_ndarray(src):
+        return u16_ndarray_encode(src.reshape(-1))
+    ints = numpy.asarray(src).reshape(-1)
+    if not len(ints):
+        return numpy.empty(0, numpy.uint8)
+    if ints.dtype.kind not in 'iu':
+        raise TypeError('expected UINT16s, not {0}'.format(ints.dtype))
+    if ints.min() < 0 or ints.max() > 0xffff:
+        raise OverflowError('value out of range for a UINT16')
+    return u16_ndarray_encode(ints.astype(numpy.uint16))
+
+def b41decode_u16_ndarray(src):
+    'Decode a base41-encoded source to an array of UINT16s (cf B41U16Decoder).'
+    require_numpy()
+    values = ndarray_values(src)
+    if len(values) % 3:
+        raise ValueError('Trailing bytes while decoding to UINT16')
+    return u16_ndarray_decode(values).astype(numpy.uint16)
+
+#   ______
+# _| MAIN |___________________________________________________________________
+
+def b41stream(src, dst, decode=False, chunk_size=STREAM_CHUNK):
+    '''Base41-encode (or decode) binary stream `src` to `dst` chunk by chunk.
+    Returns the number of bytes read and written as a tuple.'''
+    coder = B41IncrementalDecoder() if decode else B41IncrementalEncoder()
+    code = coder.decode if decode else coder.encode
+    nread = nwritten = 0
+    while True:
+        chunk = src.read(chunk_size)
+        output = code(chunk, not chunk)
+        dst.write(output)
+        nread += len(chunk)
+        nwritten += len(output)
+        if not chunk:
+            return nread, nwritten
+
+def main(argv=None):
+    'Base41-encode (or decode) a file or stdin.'
+    parser = argparse.ArgumentParser(prog='base41',
+        description='Base41-encode (or decode) SRC to DST.')
+    parser.add_argument('-d', '--decode', action='store_true',
+        help='decode rather than encode')
+    parser.add_argument('-j', '--jobs', type=int, default=1, metavar='N',
+        help='number of worker processes (0 => one per CPU)')
+    parser.add_argument('--chunk-size', type=int, metavar='N',
+        help='bytes to read at a time (default {0}, or {1} per worker'
+        ' with --jobs)'.format(STREAM_CHUNK, PARALLEL_CHUNK))
+    parser.add_argument('--stats', action='store_true',
+        help='report total time and bytes/sec to stderr')
+    parser.add_argument('src', nargs='?', default='-',
+        help='input file (default stdin)')
+    parser.add_argument('dst', nargs='?', default='-',
+        help='output file (default stdout)')
+    args = parser.parse_args(argv)
+    if args.chunk_size is not None and args.chunk_size < 1:
+        parser.error('--chunk-size must be positive')
+    if args.jobs < 0:
+        parser.error('--jobs must not be negative')
+    start = time.time()
+    if args.jobs != 1:
+        # the process pool maps whole files so needs real paths
+        if '-' in (args.src, args.dst):
+            parser.error('--jobs needs both SRC and DST files')
+        # each chunk must be a whole number of triplets (or pairs)
+        unit = 3 if args.decode else 2
+        if args.chunk_size is not None and args.chunk_size % unit:
+            parser.error('--chunk-size must be a multiple of {0}'
+                ' with --jobs'.format(unit))
+        workers = args.jobs or None
+        chunk_size = args.chunk_size or PARALLEL_CHUNK
+        if args.decode:
+            nwritten = b41decode_file_parallel(args.src, args.dst, workers,
+                chunk_size)
+        else:
+            nwritten = b41encode_file_parallel(args.src, args.dst, workers,
+                chunk_size)
+        nread = os.path.getsize(args.src)
+    else:
+        chunk_size = args.chunk_size or STREAM_CHUNK
+        src = sys.stdin.buffer if args.src == '-' else open(args.src, 'rb')
+        dst = sys.stdout.buffer if args.dst == '-' else open(args.dst, 'wb')
+        try:
+            nread, nwritten = b41stream(src, dst, args.decode, chunk_size)
+        finally:
+            if src is not sys.stdin.buffer:
+                src.close()
+            if dst is not sys.stdout.buffer:
+                dst.close()
+            else:
+                dst.flush()
+    if args.stats:
+        elapsed = time.time() - start
+        rate = nread / elapsed if elapsed else float('inf')
+        sys.stderr.write('base41: %s %d bytes to %d bytes in %.3fs'
+            ' (%.0f bytes/sec)\n' % ('decoded' if args.decode else 'encoded',
+            nread, nwritten, elapsed, rate))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+# coding: ascii ; Copyright: (c) Jazzy Services Limited 2017
+'''
+Benchmarks for base41 against base64, base85 and hex.
+
+Usage: python -m bench_base41 [--sizes N ...] [--max-size N]
+                              [--repeat N] [--min-time SECS] [-o FILE]
+
+Every codec encodes (and decodes) the same random octets at each size.
+For each call we report the best per-call latency, in seconds, and the
+throughput in bytes of *unencoded* data per second, so that encode and
+decode figures can be compared directly across codecs.
+The results are written as JSON so that runs can be saved and diffed.
+
+Copyright: (c) Jazzy Services Limited 2017
+License file: ./LICENSE
+'''
+import argparse
+import array
+import base64
+import binascii
+import json
+import platform
+import random
+import sys
+import timeit
+
+import base41
+
+# 16 B .. 100 MB
+SIZES = (16, 256, 4096, 65536, 1 << 20, 16 << 20, 100000000)
+
+def u16_array(octets):
+    'The octets as an array of native UINT16s.'
+    u16s = array.array('H')
+    u16s.frombytes(octets)
+    return u16s
+
+# (codec, case, encode, decode, prepare)
+# `prepare` converts the random octets into the encoder's input
+CASES = (
+    ('base41', 'b41encode', base41.b41encode, base41.b41decode, bytes),
+    ('base41', 'b41string', base41.b41string, base41.b41decode, bytes),
+    ('base41', 'b41encode_u16_array', base41.b41encode_u16_array,
+        base41.b41decode_u16_array, u16_array),
+    ('base64', 'b64encode', base64.b64encode, base64.b64decode, bytes),
+    ('base85', 'b85encode', base64.b85encode, base64.b85decode, bytes),
+    ('hex', 'hexlify', binascii.hexlify, binascii.unhexlify, bytes),
+)
+
+def random_octets(size):
+    'Reproducible pseudo-random octets.'
+    return random.Random(size).getrandbits(size * 8).to_bytes(size, 'little')
+
+def time_call(function, arg, repeat, min_time):
+    '''Time `function(arg)`; return the number of calls per run and
+    the best time per call over `repeat` runs.'''
+    timer = timeit.Timer(lambda: function(arg))
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = int(number * min_time / elapsed) + 1 if elapsed else number * 10
+    best = min([elapsed] + timer.repeat(repeat - 1, number))
+    return number, best / number
+
+def bench(sizes=SIZES, repeat=3, min_time=0.2, cases=CASES):
+    'Run every case at every size; return a list of result dicts.'
+    results = []
+    for size in sizes:
+        octets = random_octets(size)
+        for codec, name, encode, decode, prepare in cases:
+            src = prepare(octets)
+            encoded = encode(src)
+            if decode(encoded) != src:
+                raise AssertionError('%s round trip failed' % name)
+            for op, function, arg in (('encode', encode, src),
+                                      ('decode', decode, encoded)):
+                calls, latency = time_call(function, arg, repeat, min_time)
+                results.append({
+                    'codec': codec,
+                    'case': name,
+                    'function': function.__name__,
+                    'op': op,
+                    'size': size,
+                    'encoded_size': len(encoded),
+                    'calls': calls,
+                    'latency': latency,
+                    'throughput': size / latency if latency else None,
+                })
+    return results
+
+def environment():
+    'What the results depend on besides the code.'
+    numpy = base41.load_numpy()
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'numpy': numpy.__version__ if numpy else None,
+    }
+
+def main(argv=None):
+    'Run the benchmarks and write the results as JSON.'
+    parser = argparse.ArgumentParser(prog='bench_base41',
+        description='Benchmark base41 against base64, base85 and hex.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+        metavar='N', help='input sizes in bytes (default 16 B .. 100 MB)')
+    parser.add_argument('--max-size', type=int, metavar='N',
+        help='skip sizes above N bytes')
+    parser.add_argument('--repeat', type=int, default=3, metavar='N',
+        help='runs per measurement; the best is kept (default %(default)s)')
+    parser.add_argument('--min-time', type=float, default=0.2,
+        metavar='SECS', help='minimum duration of each run'
+        ' (default %(default)s)')
+    parser.add_argument('-o', '--output', type=argparse.FileType('w'),
+        default=sys.stdout, help='JSON output file (default stdout)')
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error('--repeat must be positive')
+    sizes = [size for size in args.sizes
+        if args.max_size is None or size <= args.max_size]
+    report = {
+        'environment': environment(),
+        'results': bench(sizes, args.repeat, args.min_time),
+    }
+    json.dump(report, args.output, indent=1, sort_keys=True)
+    args.output.write('\n')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
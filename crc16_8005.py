@@ -9,6 +9,13 @@ RefOut : True
 XorOut : 0x0000
 Check  : 0xBB3D
 '''
+import array
+import multiprocessing
+import os
+
+# NumPy (if installed) is only imported by load_numpy(), on first use
+numpy = None
+
 g_crcTable = [
     0x0000, 0xc0c1, 0xc181, 0x0140, 0xc301, 0x03c0, 0x0280, 0xc241,
     0xc601, 0x06c0, 0x0780, 0xc741, 0x0500, 0xc5c1, 0xc481, 0x0440,
@@ -44,13 +51,244 @@ g_crcTable = [
     0x8201, 0x42c0, 0x4380, 0x8341, 0x4100, 0x81c1, 0x8081, 0x4040
 ]
 
-def crc16_8005(message):
-    remainder = 0x0000 # INITIAL_REMAINDER
-    # Divide the message by the polynomial, a byte at a time.
-    for byt in message:
+INITIAL_REMAINDER = 0x0000
+
+def slice_tables(table, count):
+    '''Extend a reflected CRC table to `count` tables for slicing-by-N.
+    tables[k][byt] is the remainder of `byt` followed by k zero bytes.'''
+    tables = [table]
+    for _ in range(count - 1):
+        tables.append([(value >> 8) ^ table[value & 0xFF]
+            for value in tables[-1]])
+    return tables
+
+g_sliceTables = slice_tables(g_crcTable, 8)
+
+def octet_source(message):
+    '''The octets of `message` without copying any buffer (bytes, bytearray,
+    memoryview, mmap..); other iterables of octets are copied to bytes.'''
+    if isinstance(message, bytes):
+        return message
+    if isinstance(message, int):
+        # bytes(n) would be n zero bytes
+        raise TypeError('expected a source of octets, not int')
+    try:
+        return memoryview(message).cast('B')
+    except TypeError:
+        return bytes(message)
+
+def crc16_8005(message, remainder=INITIAL_REMAINDER):
+    '''The CRC of `message` (bytes or an iterable of octets).
+    Pass the CRC of the preceding message(s) as `remainder` to continue it.'''
+    octets = octet_source(message)
+    t0, t1, t2, t3, t4, t5, t6, t7 = g_sliceTables
+    # Slicing-by-8: divide the message by the polynomial, 8 bytes at a time.
+    # The remainder is XORed into the first 2 bytes and each byte looks up
+    # the table for the number of bytes that follow it in the slice.
+    octet = iter(octets)
+    for b0, b1, b2, b3, b4, b5, b6, b7 in zip(*[octet] * 8):
+        remainder = (t7[b0 ^ (remainder & 0xFF)] ^ t6[b1 ^ (remainder >> 8)]
+            ^ t5[b2] ^ t4[b3] ^ t3[b4] ^ t2[b5] ^ t1[b6] ^ t0[b7])
+    # Divide the rest of the message a byte at a time.
+    for byt in octets[len(octets) & ~7:]:
         key = (byt ^ remainder) & 0xFF       #  8 bits
-        crcTableValue = g_crcTable[key]      # 16 bits
+        crcTableValue = t0[key]              # 16 bits
         hiByte = (remainder >> 8)            #  8 bits
         remainder = (crcTableValue ^ hiByte) # 16 bits
     # The final remainder is the CRC.
     return remainder
+
+class CRC16_8005(object):
+    '''Incremental CRC-16/8005 with the same interface as hashlib objects.
+
+    >>> crc = CRC16_8005(b'12345')
+    >>> crc.update(b'6789')
+    >>> crc.hexdigest()
+    'bb3d'
+    '''
+    name = 'crc16_8005'
+    digest_size = 2
+    block_size = 8
+    def __init__(my, data=b''):
+        my.remainder = INITIAL_REMAINDER
+        if data:
+            my.update(data)
+    def update(my, data):
+        'Continue the CRC over `data`.'
+        my.remainder = crc16_8005(data, my.remainder)
+    def crcvalue(my):
+        'The CRC of the data so far as an int.'
+        return my.remainder
+    def digest(my):
+        'The CRC of the data so far as 2 big-endian bytes.'
+        return bytes((my.remainder >> 8, my.remainder & 0xFF))
+    def hexdigest(my):
+        'The CRC of the data so far as 4 hex digits.'
+        return '%04x' % my.remainder
+    def copy(my):
+        'A copy of this object that can be updated independently.'
+        other = my.__class__()
+        other.remainder = my.remainder
+        return other
+
+#   _________
+# _| COMBINE |_________________________________________________________________
+
+# The CRC is linear over GF(2) (Init and XorOut are both 0) so
+#   crc(A + B) == crc(A followed by len(B) zero bytes) ^ crc(B)
+# Appending zero bits to A is a 16x16 bit-matrix operator on crc(A);
+# as in zlib's crc32_combine(), we square the operator for one zero bit to
+# get the operators for 2, 4, 8.. zero bits and apply those in len(B).
+
+def gf2_times(matrix, vector):
+    'Multiply `vector` by `matrix` (a list of 16 column vectors) over GF(2).'
+    product = 0
+    column = 0
+    while vector:
+        if vector & 1:
+            product ^= matrix[column]
+        vector >>= 1
+        column += 1
+    return product
+
+def gf2_square(matrix):
+    'The square of `matrix` over GF(2).'
+    return [gf2_times(matrix, vector) for vector in matrix]
+
+def crc16_combine(crc_a, crc_b, len_b):
+    '''The CRC of message A followed by message B
+    given the CRC of A, the CRC of B and the length of B in bytes.'''
+    if len_b <= 0:
+        return crc_a
+    # operator for one zero bit: the reflected polynomial, then a shift
+    odd = [0xA001] + [1 << n for n in range(15)]
+    even = gf2_square(odd)  # 2 zero bits
+    odd = gf2_square(even)  # 4 zero bits
+    # apply len_b zero bytes to crc_a, a bit of len_b at a time
+    while True:
+        even = gf2_square(odd)
+        if len_b & 1:
+            crc_a = gf2_times(even, crc_a)
+        len_b >>= 1
+        if not len_b:
+            break
+        odd = gf2_square(even)
+        if len_b & 1:
+            crc_a = gf2_times(odd, crc_a)
+        len_b >>= 1
+        if not len_b:
+            break
+    return crc_a ^ crc_b
+
+#   _______
+# _| FILES |___________________________________________________________________
+
+PARALLEL_CHUNK = 16 << 20
+
+def crc_file_chunk(task):
+    '''The CRC and length of one chunk of a file.'''
+    path, offset, length = task
+    with open(path, 'rb') as src:
+        src.seek(offset)
+        octets = src.read(length)
+    return crc16_8005(octets), len(octets)
+
+def crc16_8005_parallel(path, workers=None, chunk_size=PARALLEL_CHUNK):
+    '''The CRC of a file, computed a chunk per process.
+
+    `workers` defaults to the number of CPUs; 1 means no process pool.
+    The chunk CRCs are merged in file order with crc16_combine().
+    '''
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive')
+    tasks = [(path, offset, chunk_size)
+        for offset in range(0, os.path.getsize(path), chunk_size)]
+    remainder = INITIAL_REMAINDER
+    if workers == 1:
+        for task in tasks:
+            crc, length = crc_file_chunk(task)
+            remainder = crc16_combine(remainder, crc, length)
+        return remainder
+    pool = multiprocessing.Pool(workers)
+    try:
+        for crc, length in pool.imap(crc_file_chunk, tasks):
+            remainder = crc16_combine(remainder, crc, length)
+    except BaseException:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+    return remainder
+
+#   _________
+# _| BATCHES |_________________________________________________________________
+
+# With NumPy, a batch of messages is divided in lockstep: a table lookup
+# for byte j of every message at once. Leading zero bytes leave the
+# remainder at 0 (Init is 0), so the messages are right-aligned in a
+# zero-padded matrix; sorting them by length means only the longest
+# messages (a tail of the batch) are still active in the early columns.
+# To keep the padding (and memory) in proportion to the messages, they are
+# divided in buckets of at most twice the shortest length in the bucket,
+# and messages longer than MANY_MAX_LENGTH are left to crc16_8005().
+MANY_MAX_LENGTH = 1024
+MANY_MIN_WIDTH = 16
+# [NumPy module or None] once the import has been tried
+g_numpy = []
+g_crcNdarray = None
+
+def load_numpy():
+    'Import NumPy and build its CRC table (once); None if not installed.'
+    global numpy, g_crcNdarray
+    if not g_numpy:
+        try:
+            import numpy as module
+        except ImportError:
+            module = None
+        if module is not None:
+            g_crcNdarray = module.array(g_crcTable, module.uint16)
+            numpy = module
+        g_numpy.append(module)
+    return g_numpy[0]
+
+def crc16_8005_bucket(messages, lengths):
+    '''The CRCs of messages sorted by length, in lockstep.'''
+    width = int(lengths[-1])
+    octets = numpy.frombuffer(b''.join(messages), numpy.uint8)
+    padded = numpy.zeros((len(messages), width), numpy.uint8)
+    padded[numpy.arange(width) >= (width - lengths)[:, None]] = octets
+    columns = numpy.ascontiguousarray(padded.T)
+    remainders = numpy.zeros(len(messages), numpy.uint16)
+    # first message still active at each column
+    starts = numpy.searchsorted(lengths, width - numpy.arange(width))
+    for column, start in zip(columns, starts.tolist()):
+        remainder = remainders[start:]
+        remainder[:] = g_crcNdarray[(remainder ^ column[start:]) & 0xFF] ^ (
+            remainder >> 8)
+    return remainders
+
+def crc16_8005_many(messages):
+    '''The CRCs of a batch of messages (each a source of octets).
+    Returns a numpy array of uint16 if NumPy is installed,
+    otherwise an array('H').'''
+    messages = [octet_source(message) for message in messages]
+    if load_numpy() is None:
+        return array.array('H', (crc16_8005(message) for message in messages))
+    lengths = numpy.array([len(message) for message in messages], numpy.intp)
+    order = numpy.argsort(lengths, kind='stable')
+    lengths = lengths[order]
+    crcs = numpy.zeros(len(messages), numpy.uint16)
+    count = int(numpy.searchsorted(lengths, MANY_MAX_LENGTH, 'right'))
+    for index in order[count:].tolist():
+        crcs[index] = crc16_8005(messages[index])
+    first = 0
+    while first < count:
+        width = max(2 * int(lengths[first]), MANY_MIN_WIDTH)
+        end = int(numpy.searchsorted(lengths[:count], width, 'right'))
+        bucket = order[first:end]
+        crcs[bucket] = crc16_8005_bucket(
+            [messages[index] for index in bucket.tolist()], lengths[first:end])
+        first = end
+    return crcs
@@ -0,0 +1,174 @@
+# coding: ascii ; Copyright: (c) Jazzy Services Limited 2017
+'''
+Table-driven CRCs for any Rocksoft model of 8 to 64 bits.
+
+A model is described by the parameters of the Rocksoft (Ross Williams)
+"Painless Guide to CRC Error Detection Algorithms":
+Width, Poly, Init, RefIn, RefOut, XorOut and Check,
+where Check is the CRC of the ASCII string '123456789'.
+crc16_8005.py is the model named "CRC-16" (aka "CRC-16/ARC").
+
+Example Usage:
+>>> MODELS['CRC-16/XMODEM'].crc(b'123456789') == 0x31C3
+True
+>>> crc = MODELS['CRC-32C'].new(b'12345')
+>>> crc.update(b'6789')
+>>> crc.hexdigest()
+'e3069283'
+
+The lookup table for a model is generated on first use, cached (models
+that differ only in Init, RefOut or XorOut share a table) and verified
+by checking the model's Check value.
+
+Copyright: (c) Jazzy Services Limited 2017
+License file: ./LICENSE
+'''
+import collections
+
+CHECK_MESSAGE = b'123456789'
+
+def reflect(value, width):
+    'The bottom `width` bits of `value` in reverse order.'
+    result = 0
+    for _ in range(width):
+        result = (result << 1) | (value & 1)
+        value >>= 1
+    return result
+
+# (width, poly, refin) => lookup table
+g_tables = {}
+# models whose Check value has been verified
+g_verified = set()
+
+def make_table(width, poly, refin):
+    'Generate the 256-entry lookup table for a polynomial.'
+    table = []
+    if refin:
+        # shift right with the reflected polynomial
+        rpoly = reflect(poly, width)
+        for byt in range(256):
+            register = byt
+            for _ in range(8):
+                register = (register >> 1) ^ rpoly if register & 1 else register >> 1
+            table.append(register)
+    else:
+        mask = (1 << width) - 1
+        top = 1 << (width - 1)
+        for byt in range(256):
+            register = byt << (width - 8)
+            for _ in range(8):
+                if register & top:
+                    register = ((register << 1) ^ poly) & mask
+                else:
+                    register = (register << 1) & mask
+            table.append(register)
+    return table
+
+class CRCModel(collections.namedtuple('CRCModel',
+        'name width poly init refin refout xorout check')):
+    'A Rocksoft CRC model; crc() and new() compute CRCs with it.'
+    __slots__ = ()
+
+    def table(my):
+        'Return the (cached) lookup table, verifying the Check value once.'
+        key = (my.width, my.poly, my.refin)
+        table = g_tables.get(key)
+        if table is None:
+            if not 8 <= my.width <= 64:
+                raise ValueError('CRC width must be from 8 to 64 bits')
+            table = g_tables[key] = make_table(my.width, my.poly, my.refin)
+        if my not in g_verified:
+            if my.finish(my.update(my.start(), CHECK_MESSAGE, table)) != my.check:
+                raise ValueError('{0}: check value is not {1:#x}'.format(
+                    my.name, my.check))
+            g_verified.add(my)
+        return table
+
+    def start(my):
+        'The register before any message bytes.'
+        return reflect(my.init, my.width) if my.refin else my.init
+
+    def update(my, register, message, table=None):
+        'Divide the message by the polynomial, a byte at a time.'
+        table = table or my.table()
+        if my.refin:
+            for byt in bytearray(message):
+                register = table[(register ^ byt) & 0xFF] ^ (register >> 8)
+        else:
+            shift = my.width - 8
+            mask = (1 << my.width) - 1
+            for byt in bytearray(message):
+                register = (table[((register >> shift) ^ byt) & 0xFF]
+                    ^ ((register << 8) & mask))
+        return register
+
+    def finish(my, register):
+        'The CRC given the register after the last message byte.'
+        if my.refin != my.refout:
+            register = reflect(register, my.width)
+        return register ^ my.xorout
+
+    def crc(my, message):
+        'The CRC of `message` (any source of octets).'
+        return my.finish(my.update(my.start(), message))
+
+    def new(my, data=b''):
+        'A hashlib-style CRC object for this model.'
+        return CRC(my, data)
+
+class CRC(object):
+    'Incremental CRC of a model with the same interface as hashlib objects.'
+    def __init__(my, model, data=b''):
+        my.model = model
+        my.name = model.name
+        my.digest_size = (model.width + 7) // 8
+        my.register = model.start()
+        if data:
+            my.update(data)
+    def update(my, data):
+        'Continue the CRC over `data`.'
+        my.register = my.model.update(my.register, data)
+    def crcvalue(my):
+        'The CRC of the data so far as an int.'
+        return my.model.finish(my.register)
+    def digest(my):
+        'The CRC of the data so far as big-endian bytes.'
+        value = my.crcvalue()
+        return bytes((value >> shift) & 0xFF
+            for shift in range(8 * my.digest_size - 8, -8, -8))
+    def hexdigest(my):
+        'The CRC of the data so far as hex digits.'
+        return '{0:0{1}x}'.format(my.crcvalue(), 2 * my.digest_size)
+    def copy(my):
+        'A copy of this object that can be updated independently.'
+        other = CRC(my.model)
+        other.register = my.register
+        return other
+
+# Presets from the catalogue of parametrised CRC algorithms (reveng)
+MODELS = dict((model.name, model) for model in (
+    CRCModel('CRC-8/SMBUS', 8, 0x07, 0x00, False, False, 0x00, 0xF4),
+    CRCModel('CRC-8/MAXIM', 8, 0x31, 0x00, True, True, 0x00, 0xA1),
+    CRCModel('CRC-16/ARC', 16, 0x8005, 0x0000, True, True, 0x0000, 0xBB3D),
+    CRCModel('CRC-16/MODBUS', 16, 0x8005, 0xFFFF, True, True, 0x0000, 0x4B37),
+    CRCModel('CRC-16/USB', 16, 0x8005, 0xFFFF, True, True, 0xFFFF, 0xB4C8),
+    CRCModel('CRC-16/XMODEM', 16, 0x1021, 0x0000, False, False, 0x0000, 0x31C3),
+    CRCModel('CRC-16/CCITT-FALSE', 16, 0x1021, 0xFFFF, False, False, 0x0000,
+        0x29B1),
+    CRCModel('CRC-16/KERMIT', 16, 0x1021, 0x0000, True, True, 0x0000, 0x2189),
+    CRCModel('CRC-16/X-25', 16, 0x1021, 0xFFFF, True, True, 0xFFFF, 0x906E),
+    CRCModel('CRC-32', 32, 0x04C11DB7, 0xFFFFFFFF, True, True, 0xFFFFFFFF,
+        0xCBF43926),
+    CRCModel('CRC-32/BZIP2', 32, 0x04C11DB7, 0xFFFFFFFF, False, False,
+        0xFFFFFFFF, 0xFC891918),
+    CRCModel('CRC-32/MPEG-2', 32, 0x04C11DB7, 0xFFFFFFFF, False, False,
+        0x00000000, 0x0376E6E7),
+    CRCModel('CRC-32C', 32, 0x1EDC6F41, 0xFFFFFFFF, True, True, 0xFFFFFFFF,
+        0xE3069283),
+    CRCModel('CRC-64/XZ', 64, 0x42F0E1EBA9EA3693, 0xFFFFFFFFFFFFFFFF, True,
+        True, 0xFFFFFFFFFFFFFFFF, 0x995DC9BBDF1939FA),
+))
+# aliases
+MODELS['CRC-16'] = MODELS['CRC-16/ARC']
+MODELS['CRC-16/IBM-3740'] = MODELS['CRC-16/CCITT-FALSE']
+MODELS['CRC-32/ISO-HDLC'] = MODELS['CRC-32']
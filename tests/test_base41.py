@@ -222,6 +222,65 @@ class Test_b41string(unittest.TestCase):
             I.assertEqual(sut, expected)
 
 
+class Test_b41encode_bulk(unittest.TestCase):
+
+    def test_types(I):
+        'Test the bulk encoder with each bytes-like type.'
+        for datum in (b'John)', bytearray(b'John)'), memoryview(b'John)')):
+            sut = base41.b41encode(datum)
+            I.assertEqual(sut, b'Omk2Uo01')
+
+    def test_strided(I):
+        'Test non-contiguous views are encoded like their octets.'
+        import io
+        datum = bytes(bytearray(range(20)))
+        view = memoryview(datum)[::2]
+        expected = base41.b41encode(datum[::2])
+        I.assertEqual(base41.b41encode(view), expected)
+        I.assertEqual(base41.b41encode_checked(view),
+            base41.b41encode_checked(datum[::2]))
+        buf = bytearray(len(expected))
+        I.assertEqual(base41.b41encode_into(view, buf), len(expected))
+        I.assertEqual(bytes(buf), expected)
+        raw = io.BytesIO()
+        with base41.B41EncodingWriter(raw) as writer:
+            writer.write(view)
+        I.assertEqual(raw.getvalue(), expected)
+
+    def test_string(I):
+        'Test the bulk encoder via b41string.'
+        sut = base41.b41string(memoryview(b'John!'))
+        I.assertEqual(sut, 'Omk2UoQ')
+
+    def test_empty(I):
+        'Test the bulk encoder with an empty buffer.'
+        I.assertEqual(base41.b41encode(b''), b'')
+
+    def test_all_pairs(I):
+        'Test the bulk encoder agrees with the iterator for every UINT16.'
+        import struct
+        datum = struct.pack('>65536H', *range(65536))
+        sut = base41.b41encode(datum)
+        expected = base41.out_tobytes(iter(base41.B41Encoder(datum)))
+        I.assertEqual(sut, expected)
+
+    def test_chunks(I):
+        'Test the bulk encoder across chunk boundaries with a trailing byte.'
+        datum = bytearray(range(256)) * 1025 + bytearray(b'\xff')
+        sut = base41.b41encode(datum)
+        expected = base41.out_tobytes(iter(base41.B41Encoder(datum)))
+        I.assertEqual(sut, expected)
+
+    def test_u16_view(I):
+        'Test the bulk encoder with a memoryview of UINT16s.'
+        from array import array
+        datum = array('H', [0x4a6f, 0x686e])
+        if sys.byteorder == 'little':
+            datum.byteswap()
+        sut = base41.b41encode(memoryview(datum))
+        I.assertEqual(sut, b'Omk2Uo')
+
+
 #   _
 # _| |________________________________________________________________________
 
@@ -475,6 +534,147 @@ class Test_b41decode_punct(unittest.TestCase):
         I.assertEqual(sut, b'#')
 
 
+class Test_b41decode_bulk(unittest.TestCase):
+
+    def test_types(I):
+        'Test the bulk decoder with each bytes-like type.'
+        for datum in (b'Omk2Uo01', bytearray(b'Omk2Uo01'), memoryview(b'Omk2Uo01')):
+            sut = base41.b41decode(datum)
+            I.assertEqual(sut, b'John)')
+
+    def test_all_pairs(I):
+        'Test the bulk decoder agrees with the iterator for every UINT16.'
+        import struct
+        expected = struct.pack('>65536H', *range(65536))
+        datum = base41.b41encode(expected)
+        I.assertEqual(base41.b41decode(datum), expected)
+        I.assertEqual(base41.b41decode(list(datum)), expected)
+
+    def test_triplet_overflow(I):
+        'Test the bulk decoder reports the first overflowing triplet.'
+        datum = b'000' * 100 + b'XXX' + b'BXV'
+        with I.assertRaises(OverflowError) as cm:
+            base41.b41decode(datum)
+        I.assertEqual(cm.exception.args[0],
+            'decoding three bytes gave a value (68920) greater than 65535' )
+
+    def test_double_overflow(I):
+        'Test the bulk decoder detects double byte overflow > 255.'
+        with I.assertRaises(OverflowError) as cm:
+            base41.b41decode(b'Omk2Uo:f')
+        I.assertEqual(cm.exception.args[0],
+            'decoding two bytes gave a value (256) greater than 255' )
+
+    def test_double_underflow(I):
+        'Test the bulk decoder detects double byte underflow < 41.'
+        with I.assertRaises(base41.UnderflowError) as cm:
+            base41.b41decode(b'X0')
+        I.assertEqual(cm.exception.args[0],
+            'decoding two bytes gave a value (40) less than 41' )
+
+
+class Test_tables(unittest.TestCase):
+
+    def test_first_use_threads(I):
+        'Test threads racing to build the lazy tables all see whole tables.'
+        import sys, threading
+        tables = (base41.g_triplets, base41.g_crc_pairs,
+            base41.g_sortable_triplets)
+        datum = bytes(bytearray(range(256)))
+        expected = (base41.b41encode(datum), base41.b41encode_checked(datum),
+            base41.b41encode_sortable(datum))
+        errors = []
+        def first_use():
+            try:
+                sut = (base41.b41encode(datum), base41.b41encode_checked(datum),
+                    base41.b41encode_sortable(datum))
+                I.assertEqual(sut, expected)
+                base41.b41decode(u'Omk2Uo' * 40)
+            except Exception as error:
+                errors.append(error)
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for table in tables:
+                del table[:]
+            base41.g_text_pairs.clear()
+            threads = [threading.Thread(target=first_use) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(interval)
+        I.assertEqual(errors, [])
+
+
+class Test_b41decode_text(unittest.TestCase):
+
+    def test_sanity(I):
+        'Test decoding text.'
+        I.assertEqual(base41.b41decode(u'Omk2Uo'), b'John')
+        I.assertEqual(base41.b41decode(u'Omk2UoQ'), b'John!')
+        I.assertEqual(base41.b41decode(u'Omk2Uo01'), b'John)')
+
+    def test_uuid(I):
+        'Test decoding a UUID from text.'
+        import uuid
+        sut = base41.b41decode(u'IQILHPPQJGIjJpG8R0FG9OUV')
+        I.assertEqual(uuid.UUID(bytes=sut),
+            uuid.UUID('a98bd614-b023-45c2-99b1-057a3edeff92'))
+
+    def test_punct(I):
+        'Test decoding text with punctuation and non-ASCII chars.'
+        datum = u'[O**m_k+,-./2U\u20ac^o]-Q'
+        I.assertEqual(base41.b41decode(datum), b'John!')
+
+    def test_alt_chars(I):
+        'Test decoding text with alternative chars.'
+        I.assertEqual(base41.b41decode(u'0a`'), base41.b41decode(b'010'))
+
+    def test_long(I):
+        'Test decoding long text.'
+        datum = bytes(bytearray(range(256)))
+        I.assertEqual(base41.b41decode(base41.b41string(datum)), datum)
+
+    def test_triplet_overflow(I):
+        'Test decoding text detects triplet overflow.'
+        with I.assertRaises(OverflowError) as cm:
+            base41.b41decode(u'Omk2UoXXX')
+        I.assertEqual(cm.exception.args[0],
+            'decoding three bytes gave a value (68920) greater than 65535' )
+
+    def test_double_underflow(I):
+        'Test decoding text detects double byte underflow.'
+        with I.assertRaises(base41.UnderflowError):
+            base41.b41decode(u'Omk2UoX0')
+
+
+class Test_b41validate(unittest.TestCase):
+
+    def test_valid(I):
+        'Test validating base41 sources.'
+        for datum in (b'Omk2Uo', u'Omk2Uo', bytearray(b'0a`'), b''):
+            I.assertEqual(base41.b41validate(datum), -1)
+
+    def test_invalid(I):
+        'Test the offset of the first non-base41 byte is found.'
+        I.assertEqual(base41.b41validate(b'Omk2U-o-'), 5)
+        I.assertEqual(base41.b41validate(memoryview(b'Omk2\n')), 4)
+        I.assertEqual(base41.b41validate(u'Omk\u20ac2Uo'), 3)
+        I.assertEqual(base41.b41validate(b' Omk'), 0)
+
+    def test_strict(I):
+        'Test strict decoding raises with the offset.'
+        I.assertEqual(base41.b41decode(b'Omk2Uo01', strict=True), b'John)')
+        with I.assertRaises(base41.InvalidCharError) as cm:
+            base41.b41decode(b'Omk2Uo,01', strict=True)
+        I.assertEqual(cm.exception.offset, 6)
+        I.assertEqual(str(cm.exception), "non-base41 byte b',' at offset 6")
+        with I.assertRaises(ValueError):
+            base41.b41decode(u'Omk 2Uo', strict=True)
+
+
 class Test_b41_encode_decode(unittest.TestCase):
 
     def test_sanity(I):
@@ -579,6 +779,785 @@ class Test_B41U16Decoder(unittest.TestCase):
         I.assertEqual(sut, expected)
 
 
+class Test_u16_arrays(unittest.TestCase):
+
+    china = u'\u4e2d\u534e\u4eba\u6c11\u5171\u548c\u56fd'
+    encoded = b'5Uk6LlGXkOBpEplUSl6jm'
+
+    def test_encode(I):
+        'Test encoding an array of UINT16s.'
+        from array import array
+        datum = array('H', map(ord, I.china))
+        I.assertEqual(base41.b41encode_u16_array(datum), I.encoded)
+        I.assertEqual(base41.b41encode_u16_array(list(datum)), I.encoded)
+
+    def test_byteorder(I):
+        'Test encoding buffers of big- and little-endian UINT16s.'
+        import struct
+        n = len(I.china)
+        big = struct.pack('>{0}H'.format(n), *map(ord, I.china))
+        little = struct.pack('<{0}H'.format(n), *map(ord, I.china))
+        I.assertEqual(base41.b41encode_u16_array(big, 'big'), I.encoded)
+        I.assertEqual(base41.b41encode_u16_array(little, 'little'), I.encoded)
+
+    def test_large(I):
+        'Test encoding and decoding agree with the iterators.'
+        from array import array
+        datum = array('H', range(0, 65536, 7))
+        enc = base41.b41encode_u16_array(datum)
+        I.assertEqual(enc, bytes(bytearray(base41.B41U16Encoder(datum))))
+        I.assertEqual(base41.b41decode_u16_array(enc), datum)
+
+    def test_decode(I):
+        'Test decoding to an array of UINT16s.'
+        from array import array
+        sut = base41.b41decode_u16_array(I.encoded.decode('ascii'))
+        I.assertEqual(sut, array('H', map(ord, I.china)))
+
+    def test_errors(I):
+        'Test odd-length buffers and trailing bytes are rejected.'
+        from array import array
+        with I.assertRaises(ValueError):
+            base41.b41encode_u16_array(b'abc')
+        with I.assertRaises(TypeError):
+            base41.b41encode_u16_array(array('b', [1, 2]))
+        with I.assertRaises(ValueError):
+            base41.b41decode_u16_array(b'5Uk6L')
+
+
+class Test_ints_uuids(unittest.TestCase):
+
+    def test_int(I):
+        'Test encoding ints agrees with encoding their octets.'
+        for n in (0, 1, 40, 41, 255, 256, 0x4a6f686e, 0x4a6f686e29, 2**128 - 1):
+            for width in (None, 17, 18):
+                size = width or max(1, (n.bit_length() + 7) // 8)
+                octets = bytes(bytearray((n >> (8 * i)) & 0xff
+                    for i in reversed(range(size))))
+                sut = base41.b41encode_int(n, width)
+                I.assertEqual(sut, base41.b41encode(octets))
+                I.assertEqual(base41.b41decode_int(sut), n)
+
+    def test_int_sanity(I):
+        'Test encoding an int with a standard byte string.'
+        I.assertEqual(base41.b41encode_int(0x4a6f686e29), b'Omk2Uo01')
+        I.assertEqual(base41.b41decode_int(u'Omk2Uo01'), 0x4a6f686e29)
+
+    def test_int_errors(I):
+        'Test encoding negative or oversized ints.'
+        with I.assertRaises(ValueError):
+            base41.b41encode_int(-1)
+        with I.assertRaises(OverflowError):
+            base41.b41encode_int(65536, 2)
+
+    def test_uuid(I):
+        'Test encoding and decoding a UUID.'
+        import uuid
+        u = uuid.UUID('a98bd614-b023-45c2-99b1-057a3edeff92')
+        sut = base41.b41encode_uuid(u)
+        I.assertEqual(sut, b'IQILHPPQJGIjJpG8R0FG9OUV')
+        I.assertEqual(base41.b41decode_uuid(sut), u)
+        I.assertEqual(base41.b41decode_uuid(sut.decode('ascii')), u)
+
+    def test_random_uuids(I):
+        'Test encoding random UUIDs agrees with encoding their bytes.'
+        from uuid import uuid4
+        for _ in range(100):
+            u = uuid4()
+            I.assertEqual(base41.b41encode_uuid(u), base41.b41encode(u.bytes))
+
+
+class Test_checked(unittest.TestCase):
+
+    def test_check(I):
+        'Test the CRC triplet of the CRC check message.'
+        sut = base41.b41encode_checked(b'123456789')
+        # 0xbb3d is the CRC-16/8005 check value
+        I.assertEqual(sut, base41.b41encode(b'123456789') + b'4EL')
+        I.assertEqual(base41.b41decode(b'4EL'), b'\xbb\x3d')
+
+    def test_round_trip(I):
+        'Test checked encoding and decoding of assorted lengths.'
+        import crc16_8005, struct
+        datum = bytes(bytearray(range(256)))
+        for length in (0, 1, 2, 3, 40, 41, 255, 256):
+            enc = base41.b41encode_checked(datum[:length])
+            crc = struct.pack('>H', crc16_8005.crc16_8005(datum[:length]))
+            I.assertEqual(enc, base41.b41encode(datum[:length]) + base41.b41encode(crc))
+            I.assertEqual(base41.b41decode_checked(enc), datum[:length])
+
+    def test_long(I):
+        'Test long payloads, which are CRC-ed after the bulk pass.'
+        import crc16_8005, struct
+        datum = bytes(bytearray(range(256))) * 65 + b'!'
+        I.assertGreater(len(datum), base41.CHECKED_FUSED_MAX)
+        enc = base41.b41encode_checked(datum)
+        crc = struct.pack('>H', crc16_8005.crc16_8005(datum))
+        I.assertEqual(enc, base41.b41encode(datum) + base41.b41encode(crc))
+        I.assertEqual(base41.b41decode_checked(enc), datum)
+        with I.assertRaises(base41.ChecksumError):
+            base41.b41decode_checked((b'0' if enc[:1] != b'0' else b'1') + enc[1:])
+
+    def test_text(I):
+        'Test decoding a checked token from text with punctuation.'
+        sut = base41.b41decode_checked(u'Omk-2Uo-01-F6L')
+        I.assertEqual(sut, b'John)')
+        I.assertEqual(base41.b41encode_checked(b'John)'), b'Omk2Uo01F6L')
+
+    def test_mismatch(I):
+        'Test a corrupt token is detected.'
+        with I.assertRaises(base41.ChecksumError):
+            base41.b41decode_checked(b'Omk2Uo02F6L')
+        with I.assertRaises(base41.ChecksumError):
+            base41.b41decode_checked(b'Omk2Uo01G6L')
+
+    def test_short(I):
+        'Test a token without a CRC triplet is rejected.'
+        with I.assertRaises(ValueError):
+            base41.b41decode_checked(b'Om')
+
+    def test_overflow(I):
+        'Test overflow is reported while decoding a checked token.'
+        with I.assertRaises(OverflowError):
+            base41.b41decode_checked(b'XXX000')
+
+
+class Test_B41Cache(unittest.TestCase):
+
+    def test_encoder(I):
+        'Test the cached encoder and its counters.'
+        enc = base41.cached_encoder(2)
+        I.assertEqual(enc(b'John'), b'Omk2Uo')
+        I.assertEqual(enc(bytearray(b'John')), b'Omk2Uo')
+        I.assertEqual(enc(b'John!'), b'Omk2UoQ')
+        I.assertEqual(enc(b'John)'), b'Omk2Uo01')
+        I.assertEqual(enc.cache_info(), (1, 3, 1, 2, 2))
+
+    def test_lru(I):
+        'Test the least recently used entry is evicted.'
+        enc = base41.cached_encoder(2)
+        enc(b'a')
+        enc(b'b')
+        enc(b'a')
+        enc(b'c')
+        enc(b'a')
+        I.assertEqual(enc.cache_info().hits, 2)
+        enc(b'b')
+        I.assertEqual(enc.cache_info().misses, 4)
+
+    def test_decoder(I):
+        'Test the cached decoder.'
+        dec = base41.cached_decoder()
+        I.assertEqual(dec(b'Omk2Uo'), b'John')
+        I.assertEqual(dec(u'Omk2Uo'), b'John')
+        I.assertEqual(dec(b'Omk2Uo'), b'John')
+        I.assertEqual(dec.cache_info().hits, 1)
+
+    def test_bypass(I):
+        'Test long sources and iterators are not cached.'
+        enc = base41.cached_encoder(maxlen=4)
+        I.assertEqual(enc(b'John)'), b'Omk2Uo01')
+        I.assertEqual(enc(iter(b'John')), b'Omk2Uo')
+        I.assertEqual(enc.cache_info(), (0, 0, 0, 4096, 0))
+
+    def test_clear(I):
+        'Test clearing the cache.'
+        enc = base41.cached_encoder()
+        enc(b'John')
+        enc.cache_clear()
+        I.assertEqual(enc.cache_info(), (0, 0, 0, 4096, 0))
+
+
+class Test_buffers(unittest.TestCase):
+
+    def test_encoded_length(I):
+        'Test the encoded length calculation.'
+        I.assertEqual(base41.b41_encoded_length(4), 6)
+        I.assertEqual(base41.b41_encoded_length(5), 8)
+        I.assertEqual(base41.b41_encoded_length(5, ord('!')), 7)
+        I.assertEqual(base41.b41_encoded_length(5, ord(')')), 8)
+
+    def test_decoded_length(I):
+        'Test the decoded length calculation.'
+        I.assertEqual(base41.b41_decoded_length(b'Omk2Uo'), 4)
+        I.assertEqual(base41.b41_decoded_length(b'Omk-2Uo,0-.-1'), 5)
+        I.assertEqual(base41.b41_decoded_length(7), 5)
+
+    def test_encode_into(I):
+        'Test encoding into a buffer at an offset.'
+        buf = bytearray(b'<' + 8 * b' ' + b'>')
+        sut = base41.b41encode_into(b'John)', buf, 1)
+        I.assertEqual(sut, 8)
+        I.assertEqual(buf, bytearray(b'<Omk2Uo01>'))
+
+    def test_encode_into_iterable(I):
+        'Test encoding an iterable into a memoryview.'
+        buf = bytearray(7)
+        sut = base41.b41encode_into(iter(b'John!'), memoryview(buf))
+        I.assertEqual(sut, 7)
+        I.assertEqual(buf, bytearray(b'Omk2UoQ'))
+
+    def test_encode_into_too_small(I):
+        'Test encoding into a buffer that is too small.'
+        with I.assertRaises(ValueError):
+            base41.b41encode_into(b'John)', bytearray(8), 1)
+
+    def test_decode_into(I):
+        'Test decoding into a buffer at an offset.'
+        buf = bytearray(b'<     >')
+        sut = base41.b41decode_into(b'Omk-2Uo,0-.-1', buf, 1)
+        I.assertEqual(sut, 5)
+        I.assertEqual(buf, bytearray(b'<John)>'))
+
+    def test_decode_into_too_small(I):
+        'Test decoding into a buffer that is too small.'
+        with I.assertRaises(ValueError):
+            base41.b41decode_into(b'Omk2Uo', bytearray(3))
+
+
+class Test_batch(unittest.TestCase):
+
+    def test_uuids(I):
+        'Test batch encoding and decoding of UUIDs.'
+        from uuid import uuid4
+        datum = [uuid4().bytes for _ in range(100)]
+        enc = base41.b41encode_many(datum)
+        I.assertEqual(enc, [base41.b41encode(u) for u in datum])
+        I.assertTrue(all(len(e) == 24 for e in enc))
+        I.assertEqual(base41.b41decode_many(enc), datum)
+
+    def test_mixed(I):
+        'Test batch encoding and decoding of assorted lengths.'
+        datum = [b'', b'J', b'John', b'John!', b'John)', bytearray(b'Jo')]
+        enc = base41.b41encode_many(iter(datum))
+        I.assertEqual(enc, [b'', b'Q1', b'Omk2Uo', b'Omk2UoQ', b'Omk2Uo01', b'Omk'])
+        enc[2] = b'Omk-2Uo'
+        I.assertEqual(base41.b41decode_many(enc), datum)
+
+    def test_overflow(I):
+        'Test batch decoding detects triplet overflow.'
+        with I.assertRaises(OverflowError):
+            base41.b41decode_many([b'Omk2Uo', b'XXX'])
+
+
+class Test_sortable(unittest.TestCase):
+
+    def test_sanity(I):
+        'Test the sortable variant with a standard byte string.'
+        I.assertEqual(base41.b41encode_sortable(b'John'), b'BDVFm2')
+        I.assertEqual(base41.b41encode_sortable(b'John)'), b'BDVFm269pp')
+        I.assertEqual(base41.b41decode_sortable(b'BDVFm269pp'), b'John)')
+        I.assertEqual(base41.b41decode_sortable(u'BDV-Fm2-69p-p'), b'John)')
+        I.assertEqual(base41.b41encode_sortable(b'Jo\x00'), b'BDV0')
+        I.assertEqual(base41.b41decode_sortable(b'BDV0'), b'Jo\x00')
+
+    def test_alphabet(I):
+        'Test the sortable alphabet is in ASCII order.'
+        I.assertEqual(sorted(base41.SORTABLE_ALFA), list(base41.SORTABLE_ALFA))
+        I.assertEqual(sorted(base41.SORTABLE_ALFA), sorted(base41.ALFA))
+
+    def test_order(I):
+        'Test encodings sort in the same order as keys of each length.'
+        import random
+        rand = random.Random(41)
+        for length in (1, 2, 3, 4):
+            keys = [bytes(bytearray(rand.randrange(256) for _ in range(length)))
+                for _ in range(500)]
+            keys += [length * b'\x00', length * b'\xff']
+            keys.sort()
+            enc = [base41.b41encode_sortable(key) for key in keys]
+            I.assertEqual(enc, sorted(enc))
+            I.assertEqual([base41.b41decode_sortable(e) for e in enc], keys)
+
+    def test_mixed_order(I):
+        'Test encodings sort in the same order as keys of mixed lengths.'
+        import random
+        rand = random.Random(41)
+        octets = (0, 1, 40, 41, 42, 254, 255)
+        keys = set([b'', b'\x00\x29', b'\x01', b'\x00\xff', b'\x00'])
+        for length in range(1, 6):
+            for _ in range(500):
+                keys.add(bytes(bytearray(rand.choice(octets + (rand.randrange(256),))
+                    for _ in range(length))))
+        keys = sorted(keys)
+        enc = [base41.b41encode_sortable(key) for key in keys]
+        I.assertEqual(enc, sorted(enc))
+        I.assertEqual([base41.b41decode_sortable(e) for e in enc], keys)
+        for octet in range(256):
+            key = bytes(bytearray((octet,)))
+            I.assertEqual(base41.b41decode_sortable(
+                base41.b41encode_sortable(key)), key)
+
+    def test_prefix(I):
+        'Test a key encodes to a prefix of longer keys.'
+        prefix = base41.b41encode_sortable(b'Jo')
+        I.assertTrue(base41.b41encode_sortable(b'John)').startswith(prefix))
+        prefix = base41.b41encode_sortable(b'\x00')
+        I.assertTrue(base41.b41encode_sortable(b'\x00\x01').startswith(prefix))
+
+    def test_triplet_overflow(I):
+        'Test the sortable decoder detects triplet overflow.'
+        with I.assertRaises(OverflowError):
+            base41.b41decode_sortable(b'pp0')
+
+    def test_trailing(I):
+        'Test the sortable decoder checks trailing bytes.'
+        for encoded in (b'BDVF', b'p', b'000p', b'BDVA'):
+            with I.assertRaises(ValueError):
+                base41.b41decode_sortable(encoded)
+
+
+class Test_B41EncodingWriter(unittest.TestCase):
+
+    def test_chunks(I):
+        'Test the writer carries octets across chunk boundaries.'
+        import io
+        datum = b'Now is the winter of our discontent'
+        for chunk_size in (2, 4, 6, 64):
+            sink = io.BytesIO()
+            writer = base41.B41EncodingWriter(sink, chunk_size)
+            for offset in range(0, len(datum), 5):
+                writer.write(datum[offset:offset + 5])
+            writer.close()
+            I.assertEqual(sink.getvalue(), base41.b41encode(datum))
+            I.assertFalse(sink.closed)
+
+    def test_flush(I):
+        'Test that flush holds back only the odd octet.'
+        import io
+        sink = io.BytesIO()
+        writer = base41.B41EncodingWriter(sink)
+        writer.write(b'John)')
+        writer.flush()
+        I.assertEqual(sink.getvalue(), b'Omk2Uo')
+        writer.close()
+        I.assertEqual(sink.getvalue(), b'Omk2Uo01')
+
+    def test_odd_chunk_size(I):
+        'Test the writer rejects an odd chunk size.'
+        import io
+        with I.assertRaises(ValueError):
+            base41.B41EncodingWriter(io.BytesIO(), 3)
+
+
+class Test_B41DecodingReader(unittest.TestCase):
+
+    def test_chunks(I):
+        'Test the reader carries partial triplets across chunk boundaries.'
+        import io
+        datum = b'Now is the winter of our discontent!'
+        enc = base41.b41encode(datum)
+        for chunk_size in (1, 2, 4, 64):
+            reader = base41.B41DecodingReader(io.BytesIO(enc), chunk_size)
+            I.assertEqual(reader.read(), datum)
+
+    def test_read_sizes(I):
+        'Test reading a few octets at a time, with punctuation.'
+        import io
+        raw = base41.B41DecodingReader(io.BytesIO(b'Omk-2Uo,0-.-1'), 2)
+        reader = io.BufferedReader(raw)
+        I.assertEqual(reader.read(3), b'Joh')
+        I.assertEqual(reader.read(3), b'n)')
+        I.assertEqual(reader.read(3), b'')
+
+    def test_overflow(I):
+        'Test the reader detects triplet overflow.'
+        import io
+        reader = base41.B41DecodingReader(io.BytesIO(b'Omk2UoXXX'), 4)
+        with I.assertRaises(OverflowError):
+            reader.read()
+
+
+class Test_B41SeekableReader(unittest.TestCase):
+
+    def test_slices(I):
+        'Test reading slices of the decoding from arbitrary offsets.'
+        import io
+        datum = bytes(bytearray(range(256))) + b'!'
+        reader = base41.B41SeekableReader(io.BytesIO(base41.b41encode(datum)))
+        for start in range(0, len(datum) + 2, 7):
+            for count in (0, 1, 2, 3, 10):
+                I.assertEqual(reader.seek(start), start)
+                I.assertEqual(reader.read(count), datum[start:start + count])
+                I.assertEqual(reader.tell(), min(start + count, max(start, len(datum))))
+
+    def test_seek_end(I):
+        'Test seeking relative to the end and the current position.'
+        import io
+        reader = base41.B41SeekableReader(io.BytesIO(b'Omk2Uo01'))
+        reader.seek(-3, io.SEEK_END)
+        I.assertEqual(reader.read(1), b'h')
+        reader.seek(1, io.SEEK_CUR)
+        I.assertEqual(reader.read(), b')')
+
+    def test_mmap(I):
+        'Test reading from a memory map.'
+        import mmap, tempfile
+        with tempfile.TemporaryFile() as f:
+            f.write(b'Omk2Uo01')
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                reader = base41.B41SeekableReader(mm)
+                reader.seek(2)
+                I.assertEqual(reader.read(2), b'hn')
+                del reader
+
+    def test_punct(I):
+        'Test the reader rejects punctuation.'
+        import io
+        reader = base41.B41SeekableReader(io.BytesIO(b'Omk-2Uo'))
+        with I.assertRaises(ValueError):
+            reader.read()
+
+
+class Test_codecs(unittest.TestCase):
+
+    def test_encode_decode(I):
+        'Test codecs.encode and codecs.decode.'
+        import codecs
+        I.assertEqual(codecs.encode(b'John)', 'base41'), b'Omk2Uo01')
+        I.assertEqual(codecs.decode(b'Omk2Uo01', 'base41'), b'John)')
+
+    def test_iterencode(I):
+        'Test the incremental encoder carries the odd octet.'
+        import codecs
+        datum = [b'J', b'oh', b'n', b')']
+        sut = b''.join(codecs.iterencode(datum, 'base41'))
+        I.assertEqual(sut, b'Omk2Uo01')
+
+    def test_iterdecode(I):
+        'Test the incremental decoder carries partial triplets.'
+        import codecs
+        datum = [b'O', b'mk2', b'U', b'o-0', b'1']
+        sut = b''.join(codecs.iterdecode(datum, 'base41'))
+        I.assertEqual(sut, b'John)')
+
+    def test_state(I):
+        'Test getstate/setstate of the incremental codecs.'
+        import codecs
+        enc = codecs.getincrementalencoder('base41')()
+        I.assertEqual(enc.encode(b'Joh'), b'Omk')
+        enc2 = codecs.getincrementalencoder('base41')()
+        enc2.setstate(enc.getstate())
+        I.assertEqual(enc2.encode(b'n)', final=True), b'2Uo01')
+        dec = codecs.getincrementaldecoder('base41')()
+        I.assertEqual(dec.decode(b'Omk2U'), b'Jo')
+        dec2 = codecs.getincrementaldecoder('base41')()
+        dec2.setstate(dec.getstate())
+        I.assertEqual(dec2.decode(b'o01', final=True), b'hn)')
+
+    def test_stream_writer(I):
+        'Test the StreamWriter writes the odd octet on reset.'
+        import codecs, io
+        sink = io.BytesIO()
+        writer = codecs.getwriter('base41')(sink)
+        writer.write(b'Joh')
+        writer.write(b'n)')
+        I.assertEqual(sink.getvalue(), b'Omk2Uo')
+        writer.reset()
+        I.assertEqual(sink.getvalue(), b'Omk2Uo01')
+
+    def test_stream_reader(I):
+        'Test the StreamReader decodes the trailing bytes at end of stream.'
+        import codecs, io
+        reader = codecs.getreader('base41')(io.BytesIO(b'Omk2Uo01'))
+        I.assertEqual(reader.read(chars=3), b'Joh')
+        I.assertEqual(reader.read(), b'n)')
+
+    def test_stream_reader_size(I):
+        'Test reading a few bytes at a time only returns empty at the end.'
+        import codecs, io
+        encoded = base41.b41encode(b'hello world')
+        for size in (1, 2):
+            reader = codecs.getreader('base41')(io.BytesIO(encoded))
+            I.assertEqual(b''.join(iter(lambda: reader.read(size), b'')),
+                b'hello world')
+
+
+class FileTestCase(unittest.TestCase):
+    'Wrapper class for tests that use files.'
+
+    def setUp(I):
+        import tempfile
+        I.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(I):
+        import shutil
+        shutil.rmtree(I.tmpdir)
+
+    def path(I, name, content=None):
+        import os
+        path = os.path.join(I.tmpdir, name)
+        if content is not None:
+            with open(path, 'wb') as f:
+                f.write(content)
+        return path
+
+
+class Test_asyncio(unittest.TestCase):
+
+    class Sink(object):
+        'Stand-in for an asyncio.StreamWriter.'
+        def __init__(I):
+            I.data = b''
+            I.drains = 0
+        def write(I, data):
+            I.data += data
+        async def drain(I):
+            I.drains += 1
+
+    def reader(I, datum):
+        import asyncio
+        reader = asyncio.StreamReader()
+        reader.feed_data(datum)
+        reader.feed_eof()
+        return reader
+
+    def test_encoder(I):
+        'Test piping an encoded stream with back-pressure.'
+        import asyncio
+        async def run():
+            sink = I.Sink()
+            coder = base41.B41StreamEncoder(I.reader(b'John)'), chunk_size=3)
+            total = await coder.pipe(sink)
+            return sink, total
+        sink, total = asyncio.run(run())
+        I.assertEqual(sink.data, b'Omk2Uo01')
+        I.assertEqual(total, 8)
+        I.assertEqual(sink.drains, 3)
+
+    def test_decoder(I):
+        'Test iterating over a decoded stream.'
+        import asyncio
+        async def run():
+            coder = base41.B41StreamDecoder(I.reader(b'Omk-2Uo01'), chunk_size=2)
+            return [chunk async for chunk in coder]
+        chunks = asyncio.run(run())
+        I.assertEqual(b''.join(chunks), b'John)')
+
+    def test_read(I):
+        'Test reading the encoding chunk by chunk.'
+        import asyncio
+        async def run():
+            coder = base41.B41StreamEncoder(I.reader(b'John'))
+            return [await coder.read(), await coder.read()]
+        I.assertEqual(asyncio.run(run()), [b'Omk2Uo', b''])
+
+
+class Test_parallel_files(FileTestCase):
+
+    def test_round_trip(I):
+        'Test encoding and decoding a file in chunks with a process pool.'
+        datum = bytes(bytearray(range(256)) * 10 + bytearray(b'\xff'))
+        src = I.path('src', datum)
+        enc = I.path('enc')
+        dec = I.path('dec')
+        size = base41.b41encode_file_parallel(src, enc, 2, chunk_size=60)
+        with open(enc, 'rb') as f:
+            encoded = f.read()
+        I.assertEqual(encoded, base41.b41encode(datum))
+        I.assertEqual(size, len(encoded))
+        base41.b41decode_file_parallel(enc, dec, 2, chunk_size=60)
+        with open(dec, 'rb') as f:
+            I.assertEqual(f.read(), datum)
+
+    def test_single_worker(I):
+        'Test encoding a file without a process pool.'
+        src = I.path('src', b'John!')
+        enc = I.path('enc')
+        base41.b41encode_file_parallel(src, enc, 1, chunk_size=2)
+        with open(enc, 'rb') as f:
+            I.assertEqual(f.read(), b'Omk2UoQ')
+
+    def test_not_base41(I):
+        'Test parallel decoding rejects punctuation.'
+        src = I.path('src', b'Omk-2Uo')
+        with I.assertRaises(ValueError):
+            base41.b41decode_file_parallel(src, I.path('dec'), 1)
+
+    def test_first_bad_offset(I):
+        'Test a pool reports the offset of the first non-B41-BYTE.'
+        encoded = bytearray(base41.b41encode(bytes(bytearray(range(256)) * 4)))
+        encoded[1000] = encoded[76] = ord('\n')
+        src = I.path('src', bytes(encoded))
+        with I.assertRaises(base41.InvalidCharError) as caught:
+            base41.b41decode_file_parallel(src, I.path('dec'), 2, chunk_size=60)
+        I.assertEqual(caught.exception.offset, 76)
+
+    def test_bad_chunk_size(I):
+        'Test the chunk sizes must be whole pairs/triplets.'
+        src = I.path('src', b'Omk2Uo')
+        with I.assertRaises(ValueError):
+            base41.b41encode_file_parallel(src, I.path('enc'), 1, chunk_size=3)
+        with I.assertRaises(ValueError):
+            base41.b41decode_file_parallel(src, I.path('dec'), 1, chunk_size=4)
+
+
+class Test_mmap_files(FileTestCase):
+
+    def test_round_trip(I):
+        'Test encoding and decoding a file via memory maps.'
+        datum = bytes(bytearray(range(256)) * 600 + bytearray(b'\xff'))
+        src = I.path('src', datum)
+        enc = I.path('enc')
+        dec = I.path('dec')
+        size = base41.b41encode_file(src, enc)
+        with open(enc, 'rb') as f:
+            encoded = f.read()
+        I.assertEqual(encoded, base41.b41encode(datum))
+        I.assertEqual(size, len(encoded))
+        I.assertEqual(base41.b41decode_file(enc, dec), len(datum))
+        with open(dec, 'rb') as f:
+            I.assertEqual(f.read(), datum)
+
+    def test_punct(I):
+        'Test decoding a file with punctuation.'
+        src = I.path('src', b'Omk-2Uo\n01\n')
+        dec = I.path('dec')
+        base41.b41decode_file(src, dec)
+        with open(dec, 'rb') as f:
+            I.assertEqual(f.read(), b'John)')
+
+    def test_empty(I):
+        'Test encoding and decoding empty files.'
+        enc = I.path('enc')
+        I.assertEqual(base41.b41encode_file(I.path('src', b''), enc), 0)
+        I.assertEqual(base41.b41decode_file(enc, I.path('dec')), 0)
+        with open(I.path('dec'), 'rb') as f:
+            I.assertEqual(f.read(), b'')
+
+
+@unittest.skipUnless(base41.load_numpy(), 'requires numpy')
+class Test_ndarray(unittest.TestCase):
+
+    def test_encode(I):
+        'Test encoding of a uint8 array.'
+        datum = base41.numpy.frombuffer(b'John)', base41.numpy.uint8)
+        sut = base41.b41encode_ndarray(datum)
+        I.assertEqual(sut.tobytes(), b'Omk2Uo01')
+
+    def test_decode(I):
+        'Test decoding to a uint8 array.'
+        sut = base41.b41decode_ndarray(b'[Omk2Uo-Q]')
+        I.assertEqual(sut.tobytes(), b'John!')
+
+    def test_round_trip(I):
+        'Test the NumPy backend agrees with the pure-Python path.'
+        datum = bytearray(range(256)) * 7 + bytearray(b'\x00')
+        enc = base41.b41encode_ndarray(datum).tobytes()
+        I.assertEqual(enc, base41.out_tobytes(iter(base41.B41Encoder(datum))))
+        I.assertEqual(base41.b41decode_ndarray(enc).tobytes(), datum)
+
+    def test_triplet_overflow(I):
+        'Test the NumPy decoder reports overflow as decode_triplet does.'
+        with I.assertRaises(OverflowError) as cm:
+            base41.b41decode_ndarray(b'000XXX')
+        I.assertEqual(cm.exception.args[0],
+            'decoding three bytes gave a value (68920) greater than 65535' )
+
+    def test_u16(I):
+        'Test encoding and decoding of UINT16 arrays.'
+        china = u'\u4e2d\u534e\u4eba\u6c11\u5171\u548c\u56fd'
+        datum = base41.numpy.array(list(map(ord, china)), base41.numpy.uint16)
+        enc = base41.b41encode_u16_ndarray(datum)
+        I.assertEqual(enc.tobytes(), b'5Uk6LlGXkOBpEplUSl6jm')
+        sut = base41.b41decode_u16_ndarray(enc)
+        I.assertEqual(sut.tolist(), datum.tolist())
+
+    def test_dtypes(I):
+        'Test UINT16 arrays are encoded by value and other dtypes rejected.'
+        numpy = base41.numpy
+        datum = numpy.array([0x4a6f, 0x686e], numpy.uint16)
+        I.assertEqual(base41.b41encode_ndarray(datum).tobytes(), b'Omk2Uo')
+        I.assertEqual(base41.b41encode_ndarray(datum.astype('>u2')).tobytes(),
+            b'Omk2Uo')
+        with I.assertRaises(TypeError):
+            base41.b41encode_ndarray(numpy.array([1.5]))
+        with I.assertRaises(TypeError):
+            base41.b41decode_ndarray(numpy.array([48, 49, 50], numpy.int32))
+
+    def test_u16_range(I):
+        'Test ints outside 0..65535 are not silently wrapped.'
+        numpy = base41.numpy
+        I.assertEqual(base41.b41encode_u16_ndarray([0x4a6f, 0x686e]).tobytes(),
+            b'Omk2Uo')
+        for datum in ([70000, -1], numpy.array([-1], numpy.int16)):
+            with I.assertRaises(OverflowError):
+                base41.b41encode_u16_ndarray(datum)
+        with I.assertRaises(TypeError):
+            base41.b41encode_u16_ndarray([1.5])
+        I.assertEqual(len(base41.b41encode_u16_ndarray([])), 0)
+
+    def test_u16_trailing(I):
+        'Test the UINT16 decoder rejects trailing bytes.'
+        with I.assertRaises(ValueError):
+            base41.b41decode_u16_ndarray(b'5Uk6L')
+
+
+class Test_main(FileTestCase):
+
+    def test_stream(I):
+        'Test streaming a file through the codec in small chunks.'
+        import io
+        datum = bytes(bytearray(range(256)) * 3 + bytearray(b'\xff'))
+        dst = io.BytesIO()
+        I.assertEqual(base41.b41stream(io.BytesIO(datum), dst, chunk_size=7),
+            (len(datum), len(base41.b41encode(datum))))
+        I.assertEqual(dst.getvalue(), base41.b41encode(datum))
+        src = io.BytesIO(dst.getvalue())
+        dst = io.BytesIO()
+        base41.b41stream(src, dst, decode=True, chunk_size=5)
+        I.assertEqual(dst.getvalue(), datum)
+
+    def test_files(I):
+        'Test the command line round trip with --stats.'
+        import contextlib
+        import io
+        src = I.path('src', b'John!')
+        enc = I.path('enc')
+        dec = I.path('dec')
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            I.assertEqual(base41.main(['--stats', '--chunk-size', '3',
+                src, enc]), 0)
+        I.assertIn('encoded 5 bytes to 7 bytes', stderr.getvalue())
+        I.assertEqual(base41.main(['-d', enc, dec]), 0)
+        with open(dec, 'rb') as f:
+            I.assertEqual(f.read(), b'John!')
+
+    def test_jobs_need_files(I):
+        'Test the process pool is refused for stdin/stdout.'
+        import contextlib
+        import io
+        with contextlib.redirect_stderr(io.StringIO()):
+            with I.assertRaises(SystemExit):
+                base41.main(['-j', '2', I.path('src', b'')])
+
+    def test_bad_jobs(I):
+        'Test negative --jobs and misaligned --chunk-size are usage errors.'
+        import contextlib
+        import io
+        src = I.path('src', b'John!')
+        for argv in (['-j', '-1', src, I.path('enc')],
+                     ['-j', '2', '--chunk-size', '3', src, I.path('enc')],
+                     ['-d', '-j', '2', '--chunk-size', '4', src, I.path('dec')]):
+            with contextlib.redirect_stderr(io.StringIO()):
+                with I.assertRaises(SystemExit):
+                    base41.main(argv)
+
+    def test_jobs_chunk_size(I):
+        'Test --chunk-size is passed to the process pool.'
+        datum = bytes(bytearray(range(256)))
+        src = I.path('src', datum)
+        enc = I.path('enc')
+        dec = I.path('dec')
+        I.assertEqual(base41.main(['-j', '2', '--chunk-size', '10', src, enc]), 0)
+        I.assertEqual(base41.main(['-d', '-j', '2', '--chunk-size', '15', enc,
+            dec]), 0)
+        with open(dec, 'rb') as f:
+            I.assertEqual(f.read(), datum)
+
+
 if __name__ == '__main__':
     print('\n+ Running Tests for Python{0.major}.{0.minor}'.format(sys.version_info))
     unittest.main()
@@ -0,0 +1,43 @@
+"""Unit tests for bench_base41.
+
+Copyright (c) Jazzy Services Limited 2017
+License: ../LICENSE
+
+"""
+import contextlib
+import io
+import json
+import unittest
+
+import context
+import bench_base41
+
+
+class Test_bench(unittest.TestCase):
+
+    def test_results(I):
+        'Test every case is measured in both directions at every size.'
+        sut = bench_base41.bench([16, 256], repeat=1, min_time=0.0001)
+        I.assertEqual(len(sut), 2 * 2 * len(bench_base41.CASES))
+        for result in sut:
+            I.assertIn(result['op'], ('encode', 'decode'))
+            I.assertGreaterEqual(result['calls'], 1)
+            I.assertGreater(result['latency'], 0)
+        sizes = set((r['case'], r['size'], r['encoded_size']) for r in sut)
+        I.assertIn(('b41encode', 16, 24), sizes)
+        I.assertIn(('hexlify', 256, 512), sizes)
+
+    def test_json(I):
+        'Test the command line writes a JSON report.'
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            sut = bench_base41.main(['--sizes', '16', '4096',
+                '--max-size', '100', '--repeat', '1', '--min-time', '0.0001'])
+        I.assertEqual(sut, 0)
+        report = json.loads(out.getvalue())
+        I.assertIn('python', report['environment'])
+        I.assertEqual(set(r['size'] for r in report['results']), set([16]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,6 +18,154 @@ class Test_CRC(unittest.TestCase):
         sut = crc16_8005.crc16_8005(message)
         I.assertEqual(sut, 0xbb3d)
 
+    def test_slicing(I):
+        'Test slicing-by-8 agrees with the bytewise CRC at every length.'
+        def bytewise(message):
+            remainder = 0
+            for byt in bytearray(message):
+                remainder = (crc16_8005.g_crcTable[(byt ^ remainder) & 0xff]
+                    ^ (remainder >> 8))
+            return remainder
+        message = bytes(bytearray(range(7, 256, 3)))
+        for length in range(len(message)):
+            I.assertEqual(crc16_8005.crc16_8005(message[:length]),
+                bytewise(message[:length]))
+
+    def test_remainder(I):
+        'Test continuing a CRC from the remainder of the previous part.'
+        sut = crc16_8005.crc16_8005(b'6789', crc16_8005.crc16_8005(b'12345'))
+        I.assertEqual(sut, 0xbb3d)
+
+    def test_sources(I):
+        'Test the message may be any source of octets.'
+        for message in (b'123456789', bytearray(b'123456789'),
+                        memoryview(b'123456789'), list(b'123456789')):
+            I.assertEqual(crc16_8005.crc16_8005(message), 0xbb3d)
+
+    def test_buffers(I):
+        'Test buffers of any format and mmaps are read in place.'
+        import array, mmap
+        message = array.array('H', [0x3231, 0x3433, 0x3635, 0x3837])
+        I.assertEqual(crc16_8005.crc16_8005(message),
+            crc16_8005.crc16_8005(message.tobytes()))
+        with mmap.mmap(-1, 9) as mapped:
+            mapped.write(b'123456789')
+            I.assertEqual(crc16_8005.crc16_8005(mapped), 0xbb3d)
+
+    def test_int(I):
+        'Test an int is not mistaken for that many zero bytes.'
+        with I.assertRaises(TypeError):
+            crc16_8005.crc16_8005(3)
+
+
+class Test_CRC16_8005(unittest.TestCase):
+
+    def test_update(I):
+        'Test checksumming a message chunk by chunk.'
+        sut = crc16_8005.CRC16_8005()
+        for chunk in (b'1', b'', b'2345678', b'9'):
+            sut.update(chunk)
+        I.assertEqual(sut.crcvalue(), 0xbb3d)
+        I.assertEqual(sut.digest(), b'\xbb\x3d')
+        I.assertEqual(sut.hexdigest(), 'bb3d')
+        I.assertEqual(len(sut.digest()), sut.digest_size)
+        I.assertEqual(sut.name, 'crc16_8005')
+
+    def test_copy(I):
+        'Test a copy continues independently of the original.'
+        prefix = crc16_8005.CRC16_8005(b'12345')
+        sut = prefix.copy()
+        sut.update(b'6789')
+        I.assertEqual(sut.crcvalue(), 0xbb3d)
+        I.assertEqual(prefix.crcvalue(), crc16_8005.crc16_8005(b'12345'))
+
+    def test_empty(I):
+        'Test the CRC of no data is the initial remainder.'
+        I.assertEqual(crc16_8005.CRC16_8005().hexdigest(), '0000')
+
+
+class Test_combine(unittest.TestCase):
+
+    def test_split(I):
+        'Test combining the CRCs of every split of a message.'
+        message = bytes(bytearray(range(7, 256, 3)))
+        expected = crc16_8005.crc16_8005(message)
+        for split in range(len(message) + 1):
+            a, b = message[:split], message[split:]
+            sut = crc16_8005.crc16_combine(crc16_8005.crc16_8005(a),
+                crc16_8005.crc16_8005(b), len(b))
+            I.assertEqual(sut, expected)
+
+    def test_long(I):
+        'Test combining across a long run of zero bytes.'
+        zeros = bytes(100000)
+        sut = crc16_8005.crc16_combine(crc16_8005.crc16_8005(b'123456789'),
+            crc16_8005.crc16_8005(zeros), len(zeros))
+        I.assertEqual(sut, crc16_8005.crc16_8005(b'123456789' + zeros))
+
+
+class Test_parallel(unittest.TestCase):
+
+    def setUp(I):
+        import tempfile
+        I.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(I):
+        import shutil
+        shutil.rmtree(I.tmpdir)
+
+    def path(I, content):
+        import os
+        path = os.path.join(I.tmpdir, 'src')
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_workers(I):
+        'Test the chunked CRC of a file with and without a process pool.'
+        message = bytes(bytearray(range(256))) * 7 + b'123'
+        path = I.path(message)
+        expected = crc16_8005.crc16_8005(message)
+        for workers in (1, 2):
+            sut = crc16_8005.crc16_8005_parallel(path, workers, chunk_size=100)
+            I.assertEqual(sut, expected)
+
+    def test_empty(I):
+        'Test the CRC of an empty file.'
+        I.assertEqual(crc16_8005.crc16_8005_parallel(I.path(b''), 1), 0)
+
+
+class Test_many(unittest.TestCase):
+
+    def test_lengths(I):
+        'Test a batch of messages of differing lengths (and none).'
+        messages = [bytes(bytearray(range(length, 3 * length)))
+            for length in (17, 0, 5, 64, 5, 1)] + [b'123456789']
+        sut = crc16_8005.crc16_8005_many(messages)
+        I.assertEqual(list(sut), [crc16_8005.crc16_8005(message)
+            for message in messages])
+        I.assertEqual(sut[-1], 0xbb3d)
+
+    def test_buckets(I):
+        'Test batches spanning several length buckets and long messages.'
+        long = crc16_8005.MANY_MAX_LENGTH + 1
+        messages = [bytes(bytearray(i & 0xff for i in range(length)))
+            for length in (long, 3, 40, 2 * long, 0, 15, 16, 33, 300, 7)]
+        sut = crc16_8005.crc16_8005_many(messages)
+        I.assertEqual(list(sut), [crc16_8005.crc16_8005(message)
+            for message in messages])
+
+    def test_empty(I):
+        'Test an empty batch.'
+        I.assertEqual(len(crc16_8005.crc16_8005_many([])), 0)
+
+    @unittest.skipUnless(crc16_8005.load_numpy(), 'requires numpy')
+    def test_ndarray(I):
+        'Test the CRCs are returned as an ndarray of uint16.'
+        sut = crc16_8005.crc16_8005_many(iter([b'12345678', b'123456789']))
+        I.assertEqual(sut.dtype, crc16_8005.numpy.uint16)
+        I.assertEqual(sut.tolist(), [crc16_8005.crc16_8005(b'12345678'), 0xbb3d])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,81 @@
+"""Unit tests for crcmodels.
+
+Copyright (c) Jazzy Services Limited 2017
+License: ../LICENSE
+
+"""
+import unittest
+
+import context
+import crc16_8005
+import crcmodels
+
+
+class Test_CRCModel(unittest.TestCase):
+
+    def test_presets(I):
+        'Test every preset model produces its check value.'
+        for name, model in crcmodels.MODELS.items():
+            I.assertEqual(model.crc(b'123456789'), model.check, name)
+
+    def test_crc16_8005(I):
+        'Test CRC-16 is the model of crc16_8005.'
+        model = crcmodels.MODELS['CRC-16']
+        I.assertEqual(model.table(), crc16_8005.g_crcTable)
+        message = bytes(bytearray(range(256)))
+        I.assertEqual(model.crc(message), crc16_8005.crc16_8005(message))
+
+    def test_crc32(I):
+        'Test CRC-32 agrees with zlib.'
+        import zlib
+        message = bytes(bytearray(range(256))) * 3
+        I.assertEqual(crcmodels.MODELS['CRC-32'].crc(message),
+            zlib.crc32(message))
+
+    def test_shared_table(I):
+        'Test models differing only in Init/RefOut/XorOut share a table.'
+        I.assertIs(crcmodels.MODELS['CRC-16/MODBUS'].table(),
+            crcmodels.MODELS['CRC-16/USB'].table())
+
+    def test_bad_check(I):
+        'Test a model with the wrong check value is rejected.'
+        model = crcmodels.CRCModel('BAD', 16, 0x8005, 0, True, True, 0, 0x1234)
+        with I.assertRaises(ValueError):
+            model.crc(b'')
+
+    def test_bad_width(I):
+        'Test widths below 8 bits are rejected.'
+        model = crcmodels.CRCModel('CRC-5/USB', 5, 0x05, 0x1F, True, True,
+            0x1F, 0x19)
+        with I.assertRaises(ValueError):
+            model.table()
+
+
+class Test_CRC(unittest.TestCase):
+
+    def test_update(I):
+        'Test checksumming a message chunk by chunk.'
+        sut = crcmodels.MODELS['CRC-16/CCITT-FALSE'].new(b'1234')
+        sut.update(b'56789')
+        I.assertEqual(sut.crcvalue(), 0x29b1)
+        I.assertEqual(sut.digest(), b'\x29\xb1')
+        I.assertEqual(sut.hexdigest(), '29b1')
+        I.assertEqual(sut.name, 'CRC-16/CCITT-FALSE')
+
+    def test_copy(I):
+        'Test a copy continues independently of the original.'
+        prefix = crcmodels.MODELS['CRC-64/XZ'].new(b'12345')
+        sut = prefix.copy()
+        sut.update(b'6789')
+        I.assertEqual(sut.hexdigest(), '995dc9bbdf1939fa')
+        I.assertEqual(sut.digest_size, 8)
+        I.assertNotEqual(prefix.crcvalue(), sut.crcvalue())
+
+    def test_crc8(I):
+        'Test an 8-bit model.'
+        I.assertEqual(crcmodels.MODELS['CRC-8/SMBUS'].new(b'123456789')
+            .digest(), b'\xf4')
+
+
+if __name__ == '__main__':
+    unittest.main()